@@ -3,18 +3,16 @@ Authentication API Routes
 User signup and authentication management
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
 from typing import Dict, Any
 
-from app.services.metronome import metronome_client
+from app.api.deps import get_metronome_client
+from app.services.metronome import SdkMetronomeClient
 from app.utils import user_store
 
 router = APIRouter()
 
-# Ensure local user store exists
-user_store.init_db()
-
 class SignupRequest(BaseModel):
     first_name: str
     last_name: str
@@ -28,7 +26,10 @@ class SignupResponse(BaseModel):
     message: str
 
 @router.post("/signup", response_model=SignupResponse)
-async def signup(request: SignupRequest) -> SignupResponse:
+async def signup(
+    request: SignupRequest,
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
+) -> SignupResponse:
     """
     Create new user account and Metronome customer
     FAILS if Metronome integration is not working
@@ -43,7 +44,7 @@ async def signup(request: SignupRequest) -> SignupResponse:
         }
         
         # Create customer in Metronome - WILL FAIL until implemented
-        metronome_customer = await metronome_client.create_customer(customer_data)
+        metronome_customer = await metronome.create_customer(customer_data)
         
         # Extract customer ID from Metronome response
         customer_id = metronome_customer.get("id")
@@ -52,7 +53,7 @@ async def signup(request: SignupRequest) -> SignupResponse:
         
         # Persist user profile locally for webhook personalization
         try:
-            user_store.upsert_user(
+            await user_store.upsert_user(
                 customer_id=customer_id,
                 email=request.email,
                 first_name=request.first_name,
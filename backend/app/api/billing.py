@@ -3,12 +3,13 @@ Billing API Routes
 Credit purchases, auto-recharge, and plan selection
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
 
-from app.services.metronome import metronome_client
+from app.api.deps import get_metronome_client
+from app.services.metronome import UPSTREAM_UNAVAILABLE, SdkMetronomeClient
 from app.core.config import settings
 
 router = APIRouter()
@@ -36,7 +37,8 @@ class CreditPurchaseResponse(BaseModel):
 @router.post("/credits/purchase")
 async def purchase_credits(
     request: CreditPurchaseRequest,
-    customer_id: str = Query(..., description="Customer ID from session")
+    customer_id: str = Query(..., description="Customer ID from session"),
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
 ) -> CreditPurchaseResponse:
     """
     Purchase credits and setup billing contract
@@ -52,8 +54,7 @@ async def purchase_credits(
             "auto_recharge": request.auto_recharge.dict() if request.auto_recharge else None
         }
         
-        credits_to_purchase = contract_data.get("credits", 0)  # Get credits directly!
-        print(f"CREDITS TO PURCHASE RETRIEVED FROM FRONTEND: {credits_to_purchase}")
+        logger.debug("Credit purchase for %s: %s credits", customer_id, contract_data.get("credits", 0))
 
         # Create billing contract in Metronome 
         # contract_data = {
@@ -62,7 +63,7 @@ async def purchase_credits(
         #     credits:request.credits
         # }
        
-        contract = await metronome_client.create_billing_contract(customer_id, contract_data)
+        contract = await metronome.create_billing_contract(customer_id, contract_data)
 
         
         contract_id = contract.get("id")
@@ -86,7 +87,9 @@ async def purchase_credits(
             detail=f"Credit purchase failed: {str(e)}"
         )
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import time
 
 # ----------------------
 # Plans API (catalog + selection)
@@ -94,6 +97,22 @@ from datetime import datetime
 
 CREDITS_PER_DOLLAR = 4000
 
+
+def _current_hour() -> int:
+    return int(time.time()) // 3600
+
+
+@lru_cache(maxsize=8)
+def _contract_window(hour: int, start_offset_hours: int, days: int) -> Tuple[str, str]:
+    """
+    (start, end) ISO-8601 UTC strings for a contract starting on an hour
+    boundary. Keyed by the epoch hour, so only the first call each hour
+    does the datetime work.
+    """
+    start_dt = datetime.fromtimestamp((hour + start_offset_hours) * 3600, tz=timezone.utc)
+    end_dt = start_dt + timedelta(days=days)
+    return start_dt.isoformat().replace("+00:00", "Z"), end_dt.isoformat().replace("+00:00", "Z")
+
 class PlanCatalogItem(BaseModel):
     id: str
     name: str
@@ -152,7 +171,8 @@ async def get_plans() -> Dict[str, Any]:
 @router.post("/plan/select")
 async def select_plan(
     request: PlanSelectRequest,
-    customer_id: str = Query(..., description="Metronome customer ID from session")
+    customer_id: str = Query(..., description="Metronome customer ID from session"),
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
 ) -> PlanSelectResponse:
     """
     Select a billing plan and create the corresponding Metronome contract.
@@ -166,19 +186,10 @@ async def select_plan(
     try:
         if plan == "trial":
             # Trial window: start at current hour boundary, end at boundary N days later (UTC)
-            from datetime import datetime, timedelta, timezone
-
-            def floor_to_hour(dt: datetime) -> datetime:
-                return dt.replace(minute=0, second=0, microsecond=0)
-
-            now = datetime.now(timezone.utc)
             # Start at previous hour boundary to absorb clock skew/latency
-            start_dt = floor_to_hour(now) - timedelta(hours=1)
-            end_dt = start_dt + timedelta(days=settings.METRONOME_TRIAL_DAYS)
-            start_iso = start_dt.isoformat().replace("+00:00", "Z")
-            end_iso = end_dt.isoformat().replace("+00:00", "Z")
+            start_iso, end_iso = _contract_window(_current_hour(), -1, settings.METRONOME_TRIAL_DAYS)
 
-            contract = await metronome_client.create_billing_contract(
+            contract = await metronome.create_billing_contract(
                 customer_id,
                 {
                     "credits": settings.METRONOME_TRIAL_CREDITS,
@@ -198,18 +209,9 @@ async def select_plan(
             # Grant fixed plan credits immediately (no thresholds/recurrence for demo)
             monthly_credits = 250_000 if plan == "creator" else 1_000_000
 
-            from datetime import datetime, timedelta, timezone
-
-            def floor_to_hour(dt: datetime) -> datetime:
-                return dt.replace(minute=0, second=0, microsecond=0)
+            start_iso, end_iso = _contract_window(_current_hour(), 0, 365)
 
-            now = datetime.now(timezone.utc)
-            start_dt = floor_to_hour(now)
-            end_dt = start_dt + timedelta(days=365)
-            start_iso = start_dt.isoformat().replace("+00:00", "Z")
-            end_iso = end_dt.isoformat().replace("+00:00", "Z")
-
-            contract = await metronome_client.create_billing_contract(
+            contract = await metronome.create_billing_contract(
                 customer_id,
                 {
                     "credits": monthly_credits,
@@ -244,36 +246,36 @@ async def select_plan(
 # Update this in backend/app/api/billing.py
 
 @router.get("/credits/balance/{customer_id}")
-async def get_credit_balance(customer_id: str):
+async def get_credit_balance(
+    customer_id: str,
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
+):
     """
     Get current credit balance from Metronome - NO FALLBACKS
     """
     try:
-        print("=" * 70)
-        print(f"🔍 BALANCE REQUEST:")
-        print(f"   Customer ID: {customer_id}")
-        print(f"   Timestamp: {datetime.now().isoformat()}")
-        print("=" * 70)
+        logger.debug("Balance request for %s", customer_id)
         
         # Call Metronome API - let it fail if it fails
-        balance_data = await metronome_client.get_customer_balance(customer_id)
+        balance_data = await metronome.get_customer_balance(customer_id)
         
-        print("=" * 70)
-        print(f"✅ BALANCE SUCCESS:")
-        print(f"   Balance: {balance_data.get('balance', 0)} credits")
-        print(f"   Dollar Value: ${balance_data.get('dollar_value', 0):.2f}")
-        print(f"   Source: {balance_data.get('source', 'unknown')}")
-        print("=" * 70)
+        logger.debug(
+            "Balance for %s: %s credits ($%.2f) from %s",
+            customer_id,
+            balance_data.get("balance", 0),
+            balance_data.get("dollar_value", 0),
+            balance_data.get("source", "unknown"),
+        )
         
         return balance_data
         
+    except UPSTREAM_UNAVAILABLE as e:
+        logger.error("Metronome unavailable for balance of %s: %s", customer_id, e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Balance temporarily unavailable: {str(e)}"
+        )
     except Exception as e:
-        print("=" * 70)
-        print(f"❌ BALANCE API ERROR:")
-        print(f"   Customer ID: {customer_id}")
-        print(f"   Error: {str(e)}")
-        print("=" * 70)
-        
         logger.error(f"Failed to get customer balance for {customer_id}: {e}")
         
         # Return the actual error to help debug - NO FALLBACKS
@@ -283,10 +285,13 @@ async def get_credit_balance(customer_id: str):
         )
 # Trial status endpoint: compute days_left from balances
 @router.get("/trial-status")
-async def trial_status(customer_id: str = Query(...)) -> Dict[str, Any]:
+async def trial_status(
+    customer_id: str = Query(...),
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
+) -> Dict[str, Any]:
     try:
         from datetime import datetime, timezone
-        balances = await metronome_client.list_customer_balances(customer_id)  # type: ignore
+        balances = await metronome.list_customer_balances(customer_id)  # type: ignore
         items = balances.get('data', [])
         end_dt = None
         for entry in items:
@@ -0,0 +1,12 @@
+"""
+Shared FastAPI dependencies
+"""
+
+from fastapi import Request
+
+from app.services.metronome import SdkMetronomeClient
+
+
+def get_metronome_client(request: Request) -> SdkMetronomeClient:
+    """The app-wide Metronome client (one connection pool and cache set), set up in lifespan."""
+    return request.app.state.metronome
@@ -3,16 +3,20 @@ Health and Integration Self-Check Endpoints
 Read-only probes to validate Metronome configuration
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from typing import Dict, Any
 from app.core.config import settings
-from app.services.metronome import metronome_client
+from app.api.deps import get_metronome_client
+from app.services.metronome import SdkMetronomeClient
+from app.utils import user_store
 
 router = APIRouter()
 
 
 @router.get("/integrations")
-async def integrations_health() -> Dict[str, Any]:
+async def integrations_health(
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
+) -> Dict[str, Any]:
     """
     Read-only self-check for Metronome integration.
     - Validates API credentials reach Metronome
@@ -46,7 +50,7 @@ async def integrations_health() -> Dict[str, Any]:
         # We don't expose a public list method; infer reachability by resolving the card name
         resolved_id: Optional[str] = None
         try:
-            resolved_id = await metronome_client.get_rate_card()  # type: ignore[attr-defined]
+            resolved_id = await metronome.get_rate_card()  # type: ignore[attr-defined]
         except Exception as inner:
             # Still reachable if the SDK can call list; treat missing name separately
             resolved_id = None
@@ -60,7 +64,7 @@ async def integrations_health() -> Dict[str, Any]:
     rc_name = getattr(settings, "METRONOME_RATE_CARD_NAME", None)
     try:
         if rc_name:
-            rate_card_id = await metronome_client.get_rate_card(rc_name)  # type: ignore[attr-defined]
+            rate_card_id = await metronome.get_rate_card(rc_name)  # type: ignore[attr-defined]
         checks["metronome"]["rate_card_resolved"] = {"ok": bool(rate_card_id), "id": rate_card_id, "name": rc_name}
     except Exception as e:
         checks["metronome"]["rate_card_resolved"] = {"ok": False, "error": str(e), "name": rc_name}
@@ -70,7 +74,7 @@ async def integrations_health() -> Dict[str, Any]:
     try:
         # Lightweight check: see if the 'Vocalis Credits' product exists without creating it
         try:
-            products = await metronome_client.list_products_readonly()  # type: ignore[attr-defined]
+            products = await metronome.list_products_readonly()  # type: ignore[attr-defined]
             for p in products:
                 current = getattr(p, "current", None)
                 name = getattr(current, "name", "") if current is not None else ""
@@ -93,3 +97,15 @@ async def integrations_health() -> Dict[str, Any]:
         "summary": "Metronome reachable; see checks for details" if overall_ok else "Some checks failed",
         "checks": checks,
     }
+
+
+@router.get("/db")
+async def db_health() -> Dict[str, Any]:
+    """
+    Local user store pool usage: open/idle/active connections.
+    """
+    stats = user_store.pool_stats()
+    return {
+        "status": "ok" if stats["active"] < stats["size"] else "busy",
+        "pool": stats,
+    }
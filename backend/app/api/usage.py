@@ -3,15 +3,15 @@ Usage API Routes
 Voice generation and usage tracking with real Metronome ingest
 """
 
-import asyncio
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Dict, Any, Optional
 import uuid
 from datetime import datetime, timezone
 import logging
 
-from app.services.metronome import metronome_client
+from app.api.deps import get_metronome_client
+from app.services.metronome import UPSTREAM_UNAVAILABLE, SdkMetronomeClient
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -32,6 +32,9 @@ class VoiceGenerationResponse(BaseModel):
     transaction_id: Optional[str] = None
     message: str
 
+def _utc_timestamp() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
 def build_voice_generation_event(request: VoiceGenerationRequest, customer_id: str) -> Dict[str, Any]:
     """
     Build voice generation event for Metronome ingest
@@ -44,7 +47,7 @@ def build_voice_generation_event(request: VoiceGenerationRequest, customer_id: s
         Formatted event payload for Metronome
     """
     # Use explicit UTC timestamps per Metronome guidance
-    ts_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+    ts_utc = _utc_timestamp()
     return {
         "customer_id": customer_id,
         "event_type": "voice_generation",
@@ -67,7 +70,7 @@ def build_voice_cloning_event(request: VoiceGenerationRequest, customer_id: str)
     Returns:
         Formatted event payload for Metronome
     """
-    ts_utc = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+    ts_utc = _utc_timestamp()
     return {
         "customer_id": customer_id,
         "event_type": "voice_cloning",
@@ -100,94 +103,67 @@ def calculate_credits_needed(request: VoiceGenerationRequest) -> int:
 @router.post("/generate-voice")
 async def generate_voice(
     request: VoiceGenerationRequest,
-    customer_id: str = Query(..., description="Customer ID from session")
+    customer_id: str = Query(..., description="Customer ID from session"),
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
 ) -> VoiceGenerationResponse:
     """
     Generate voice and record usage in Metronome via ingest
     ✅ ENHANCED: Now actually records usage and deducts credits
     """
     try:
-        logger.info(f"Processing voice generation: {request.voice_type} for customer {customer_id}")
-        print(f"🎵 VOICE GENERATION REQUEST:")
-        print(f"   Customer: {customer_id}")
-        print(f"   Voice Type: {request.voice_type}")
-        print(f"   Text Length: {request.character_count} characters")
-    
+        logger.info("Processing voice generation: %s for customer %s", request.voice_type, customer_id)
         
         # 1. Get current balance to validate sufficient credits
-        balance_data = await metronome_client.get_customer_balance(customer_id)
+        balance_data = await metronome.get_customer_balance(customer_id)
         current_balance = balance_data.get("balance", 0)
         
         # 2. Calculate credits needed
         credits_needed = calculate_credits_needed(request)
         
-        logger.info(f"Credits needed: {credits_needed}, Current balance: {current_balance}")
-        print(f"💰 BALANCE CHECK:")
-        print(f"   Current Balance: {current_balance} credits")
-        print(f"   Credits Needed: {credits_needed} credits")
-        print(f"   Sufficient Funds: {current_balance >= credits_needed}")
+        logger.info("Credits needed: %s, Current balance: %s", credits_needed, current_balance)
         
         # 3. Validate sufficient balance
         if current_balance < credits_needed:
-            error_msg = f"Insufficient credits: need {credits_needed}, have {current_balance}"
-            print(f"❌ {error_msg}")
             raise HTTPException(
                 status_code=400,
-                detail=error_msg
+                detail=f"Insufficient credits: need {credits_needed}, have {current_balance}"
             )
         
         # 4. Build appropriate event based on voice type
         if request.voice_type in ["standard", "premium"]:
             event_payload = build_voice_generation_event(request, customer_id)
-            print(f"🎯 Built voice generation event")
         elif request.voice_type == "clone":
             event_payload = build_voice_cloning_event(request, customer_id)
-            print(f"🎯 Built voice cloning event")
         else:
-            error_msg = f"Invalid voice type: {request.voice_type}"
-            print(f"❌ {error_msg}")
             raise HTTPException(
                 status_code=400,
-                detail=error_msg
+                detail=f"Invalid voice type: {request.voice_type}"
             )
         
-        print(f"📦 EVENT PAYLOAD:")
-        print(f"   Event Type: {event_payload.get('event_type')}")
-        print(f"   Transaction ID: {event_payload.get('transaction_id')}")
-        print(f"   Properties: {event_payload.get('properties')}")
+        logger.debug(
+            "Usage event %s (%s): %s",
+            event_payload.get("transaction_id"),
+            event_payload.get("event_type"),
+            event_payload.get("properties"),
+        )
         
-        # 5. Ingest usage event to Metronome
-        print(f"📡 Sending usage event to Metronome...")
-        ingest_result = await metronome_client.ingest_usage_event(event_payload)
+        # 5. Queue the usage event for Metronome; it is sent with the next batch
+        ingest_result = await metronome.ingest_usage_event(event_payload, background=True)
         
         if not ingest_result.get('success'):
-            error_msg = "Failed to record usage in Metronome"
-            print(f"❌ {error_msg}")
             raise HTTPException(
                 status_code=500,
-                detail=error_msg
+                detail="Failed to record usage in Metronome"
             )
         
-        print(f"✅ Usage event recorded successfully in Metronome")
-        
-        # 6. Get updated balance after usage
-      
-        # Wait for Metronome to process the usage
-        print(f"wait 5 seconds before fetching balance")
-        await asyncio.sleep(5)  
-        print(f"📊 Getting updated balance...")
-        updated_balance_data = await metronome_client.get_customer_balance(customer_id)
-        new_balance = updated_balance_data.get("balance", current_balance - credits_needed)
-        
-        print(f"💰 BALANCE UPDATE:")
-        print(f"   Previous Balance: {current_balance} credits")
-        print(f"   Credits Used: {credits_needed} credits")
-        print(f"   New Balance: {new_balance} credits")
+        # 6. Report the expected balance; re-reading Metronome here would
+        # race the queued event and only return the pre-usage value
+        new_balance = current_balance - credits_needed
         
-        logger.info(f"✅ Voice generation complete: {credits_needed} credits used, new balance: {new_balance}")
+        logger.info("Voice generation complete: %s credits used, expected balance: %s", credits_needed, new_balance)
         
         # 7. Return success with actual usage data
-        response = VoiceGenerationResponse(
+        return VoiceGenerationResponse(
             success=True,
             credits_consumed=credits_needed,
             new_balance=new_balance,
@@ -196,20 +172,18 @@ async def generate_voice(
             message=f"{request.voice_type.title()} voice generated successfully"
         )
         
-        print(f"🎉 VOICE GENERATION SUCCESS:")
-        print(f"   Voice Type: {response.voice_type}")
-        print(f"   Credits Consumed: {response.credits_consumed}")
-        print(f"   New Balance: {response.new_balance}")
-        print(f"   Transaction ID: {response.transaction_id}")
-        
-        return response
-        
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
+    except UPSTREAM_UNAVAILABLE as e:
+        # Never generate against an unknown balance; let the client retry
+        logger.error("Voice generation blocked, Metronome unavailable: %s", e)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Billing temporarily unavailable: {str(e)}"
+        )
     except Exception as e:
-        logger.error(f"❌ Voice generation failed: {e}")
-        print(f"❌ VOICE GENERATION ERROR: {e}")
+        logger.error("Voice generation failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Voice generation failed: {str(e)}"
@@ -3,21 +3,28 @@ Webhook API Routes
 Handle Metronome webhooks for billing events and alerts
 """
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from typing import Dict, Any, Set
+from typing import Dict, Any, Optional, Set
 import hashlib
 import hmac
-import json
 import asyncio
+import logging
 from datetime import datetime
+from functools import lru_cache
+
+import orjson
 
 
 # Add this import for the Metronome client
-from app.services.metronome import metronome_client
-from app.utils.email import send_welcome_email, send_conversion_email
+from app.api.deps import get_metronome_client
+from app.services.metronome import SdkMetronomeClient
+from app.utils.email import schedule_conversion_email, schedule_welcome_email
 from app.utils import user_store
 from app.core.config import settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
 
 active_connections: Dict[str, Set[asyncio.Queue]] = {}
 # In-memory idempotency store for webhook IDs we've already processed
@@ -25,8 +32,30 @@ processed_webhook_ids: Set[str] = set()
 
 router = APIRouter()
 
+# Constant SSE frames, encoded once instead of per connection/keep-alive
+CONNECTED_FRAME = b"data: " + orjson.dumps({"type": "connected", "message": "Real-time updates active"}) + b"\n\n"
+PING_FRAME = b"data: " + orjson.dumps({"type": "ping"}) + b"\n\n"
+
+# Per-connection SSE buffer; a stalled client loses its oldest events instead
+# of growing memory without bound
+SSE_QUEUE_MAXSIZE = 256
+
+# With Redis configured, broadcasts are published here and every worker's relay
+# delivers them to its own local connections
+SSE_CHANNEL_PREFIX = "vocalis:sse:"
+_sse_relay_task: Optional[asyncio.Task] = None
+
+
+def _pretty_json(data: Any) -> str:
+    # orjson's indent runs in C; stdlib json.dumps(indent=2) blocks the loop far longer
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+
 @router.post("/metronome/alerts")
-async def handle_metronome_alerts(request: Request):
+async def handle_metronome_alerts(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    metronome: SdkMetronomeClient = Depends(get_metronome_client),
+):
     """
     ✅ ENHANCED: Handle Metronome alert webhooks with auto-recharge processing
     
@@ -55,24 +84,21 @@ async def handle_metronome_alerts(request: Request):
             if not signature or not verify_webhook_signature(signature, date_header, raw_body, secret):
                 raise HTTPException(status_code=401, detail="Invalid webhook signature")
             try:
-                webhook_data = json.loads(raw_body.decode("utf-8") or "{}")
+                webhook_data = orjson.loads(raw_body) if raw_body.strip() else {}
             except Exception:
                 webhook_data = {}
         else:
             # Fallback: proceed without signature enforcement when secret not set
-            webhook_data = await request.json()
+            webhook_data = orjson.loads(await request.body())
         
-        # 🔍 COMPREHENSIVE WEBHOOK LOGGING
-        print("=" * 70)
-        print("🔔 METRONOME ALERT WEBHOOK RECEIVED:")
-        print(f"   Webhook ID: {webhook_data.get('id')}")
-        print(f"   Type: {webhook_data.get('type')}")
-        print(f"   Timestamp: {headers.get('date')}")
-        print(f"   Properties: {json.dumps(webhook_data.get('properties', {}), indent=2)}")
-        # Avoid dumping all headers (may include sensitive info)
-        safe_headers = {k: headers.get(k) for k in ["date", "user-agent", "content-type"] if headers.get(k)}
-        print(f"   Header summary: {safe_headers}")
-        print("=" * 70)
+        logger.info(
+            "Metronome alert webhook received: id=%s type=%s date=%s",
+            webhook_data.get('id'), webhook_data.get('type'), headers.get('date'),
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            # Avoid dumping all headers (may include sensitive info)
+            safe_headers = {k: headers.get(k) for k in ["date", "user-agent", "content-type"] if headers.get(k)}
+            logger.debug("Alert properties: %s headers: %s", _pretty_json(webhook_data.get('properties', {})), safe_headers)
         
         # Handle specific alert types
         alert_type = webhook_data.get('type')
@@ -84,19 +110,19 @@ async def handle_metronome_alerts(request: Request):
             remaining_balance = properties.get('remaining_balance')
             threshold = properties.get('threshold')
             
-            print(f"🚨 LOW CREDIT BALANCE ALERT:")
-            print(f"   Customer: {customer_id}")
-            print(f"   Remaining: {remaining_balance} credits")
-            print(f"   Threshold: {threshold} credits")
+            logger.info(
+                "Low credit balance: customer=%s remaining=%s threshold=%s",
+                customer_id, remaining_balance, threshold,
+            )
             
         elif alert_type == 'payment_gate.threshold_reached':
             customer_id = properties.get('customer_id')
             contract_id = properties.get('contract_id')
             
-            print(f"🎯 AUTO-RECHARGE THRESHOLD REACHED:")
-            print(f"   Customer: {customer_id}")
-            print(f"   Contract: {contract_id}")
-            print(f"   ⏳ Waiting for external_initiate webhook...")
+            logger.info(
+                "Auto-recharge threshold reached: customer=%s contract=%s; waiting for external_initiate",
+                customer_id, contract_id,
+            )
             
 
         elif alert_type == 'payment_gate.external_initiate':
@@ -108,16 +134,13 @@ async def handle_metronome_alerts(request: Request):
             invoice_total = properties.get('invoice_total')
             invoice_currency = properties.get('invoice_currency')
             
-            print(f"💳 AUTO-RECHARGE PAYMENT REQUEST:")
-            print(f"   Customer: {customer_id}")
-            print(f"   Contract: {contract_id}")
-            print(f"   Invoice: {invoice_id}")
-            print(f"   Workflow: {workflow_id}")
-            print(f"   Amount: {invoice_total} cents (${invoice_total/100:.2f})")
-            print(f"   Currency: {invoice_currency}")
+            logger.info(
+                "Auto-recharge payment request: customer=%s contract=%s invoice=%s workflow=%s amount=%s %s",
+                customer_id, contract_id, invoice_id, workflow_id, invoice_total, invoice_currency,
+            )
             
             if not workflow_id:
-                print("❌ No workflow_id provided - cannot process payment")
+                logger.error("Auto-recharge payment request without workflow_id; cannot process payment")
                 return {
                     "status": "error",
                     "message": "Missing workflow_id"
@@ -125,28 +148,23 @@ async def handle_metronome_alerts(request: Request):
             
             try:
                 # 💳 FAKE THE PAYMENT - Just release with "paid" outcome
-                print(f"💳 FAKING PAYMENT SUCCESS - Releasing commit...")
+                logger.info("Faking payment success, releasing workflow %s", workflow_id)
                 
-                # result = await metronome_client.release_threshold_billing(workflow_id, "paid")
-                result = await metronome_client.safe_release_threshold_billing(workflow_id, "paid")
+                # result = await metronome.release_threshold_billing(workflow_id, "paid")
+                result = await metronome.safe_release_threshold_billing(workflow_id, "paid")
                 
                 if result.get('success'):
-                    print(f"✅ COMMIT RELEASED SUCCESSFULLY!")
-                    print(f"   Customer {customer_id} now has additional credits!")
-                    print(f"   Workflow {workflow_id} completed successfully")
+                    logger.info("Commit released: customer=%s workflow=%s", customer_id, workflow_id)
                     
                     # 🚀 ADD THIS NEW SECTION - GET UPDATED BALANCE AND BROADCAST
                     try:
-                        print(f"📊 Getting updated balance after auto-recharge...")
-                        updated_balance = await metronome_client.get_customer_balance(customer_id)
+                        updated_balance = await metronome.get_customer_balance(customer_id, force_refresh=True)
                         new_credit_balance = updated_balance.get('balance', 0)
                         
-                        print(f"📊 BROADCASTING BALANCE UPDATE:")
-                        print(f"   Customer: {customer_id}")
-                        print(f"   New Balance: {new_credit_balance} credits")
+                        logger.info("Broadcasting balance update: customer=%s balance=%s", customer_id, new_credit_balance)
                         
                         # 🚀 BROADCAST REAL-TIME UPDATE TO FRONTEND
-                        await broadcast_event(customer_id, {
+                        background_tasks.add_task(broadcast_event, customer_id, {
                             "type": "balance_updated",
                             "new_balance": new_credit_balance,
                             "auto_recharge": True,
@@ -154,37 +172,33 @@ async def handle_metronome_alerts(request: Request):
                             "timestamp": datetime.now().isoformat()
                         })
                         
-                        print(f"✅ Real-time balance update sent to frontend!")
-                        
                     except Exception as balance_error:
-                        print(f"⚠️ Failed to get updated balance: {balance_error}")
+                        logger.warning("Failed to get updated balance for %s: %s", customer_id, balance_error)
                         # Still broadcast a generic update
-                        await broadcast_event(customer_id, {
+                        background_tasks.add_task(broadcast_event, customer_id, {
                             "type": "auto_recharge_complete",
                             "message": "Auto-recharge completed successfully!",
                             "timestamp": datetime.now().isoformat()
                         })
                     
                 else:
-                    print(f"❌ Failed to release commit: {result}")
+                    logger.error("Failed to release commit for workflow %s: %s", workflow_id, result)
                     
             except Exception as e:
-                print(f"❌ AUTO-RECHARGE RELEASE FAILED: {e}")
-                print(f"   Workflow: {workflow_id}")
-                print(f"   Customer: {customer_id}")
+                logger.error("Auto-recharge release failed: workflow=%s customer=%s: %s", workflow_id, customer_id, e)
 
 
         elif alert_type == 'alerts.usage_threshold_reached':
-            print(f"📊 USAGE THRESHOLD REACHED")
+            logger.info("Usage threshold reached")
             
         elif alert_type == 'alerts.spend_threshold_reached':
-            print(f"💰 SPEND THRESHOLD REACHED")
+            logger.info("Spend threshold reached")
         
         elif alert_type == 'contract.start':
             # Onboarding email on contract start (offset notification or system event)
             webhook_id = webhook_data.get('id')
             if webhook_id and webhook_id in processed_webhook_ids:
-                print(f"ℹ️  Duplicate contract.start webhook {webhook_id} ignored")
+                logger.info("Duplicate contract.start webhook %s ignored", webhook_id)
             else:
                 if webhook_id:
                     processed_webhook_ids.add(webhook_id)
@@ -198,7 +212,7 @@ async def handle_metronome_alerts(request: Request):
                 if not email_to:
                     # Try fetching customer to resolve email
                     try:
-                        customer = await metronome_client.get_customer(customer_id)
+                        customer = await metronome.get_customer(customer_id)
                         # Try to derive email from ingest_aliases/external_id pattern vocalis_<email>
                         ingest_aliases = customer.get('ingest_aliases') or []
                         derived = None
@@ -213,16 +227,16 @@ async def handle_metronome_alerts(request: Request):
                                 derived = ext.replace('vocalis_', '', 1)
                         email_to = derived or settings.DEMO_EMAIL_TO
                     except Exception as resolve_err:
-                        print(f"⚠️ Could not resolve customer email: {resolve_err}")
+                        logger.warning("Could not resolve customer email: %s", resolve_err)
 
                 if email_to:
-                    print(f"📧 Sending welcome email to customer {customer_id} → {email_to}")
+                    logger.info("Sending welcome email to customer %s", customer_id)
                     try:
                         # Compute actual credits granted and trial end
                         trial_end_str = None
                         credits_granted = settings.METRONOME_TRIAL_CREDITS
                         try:
-                            balances = await metronome_client.list_customer_balances(customer_id)
+                            balances = await metronome.list_customer_balances(customer_id)
                             items = balances.get('data', [])
                             target_end_dt = None
                             for entry in items:
@@ -245,12 +259,12 @@ async def handle_metronome_alerts(request: Request):
                                     target_end_dt = target_end_dt.replace(tzinfo=_tz.utc)
                                 trial_end_str = target_end_dt.strftime('%b %d, %Y %H:%M UTC')
                         except Exception as e:
-                            print(f"⚠️ Could not compute trial info: {e}")
+                            logger.warning("Could not compute trial info: %s", e)
 
                         # Prefer stored user profile (first_name) from local DB
                         if not first_name:
                             try:
-                                prof = user_store.get_user_by_customer_id(customer_id)
+                                prof = await user_store.get_user_by_customer_id(customer_id)
                                 if prof and prof.get('first_name'):
                                     first_name = prof['first_name']
                             except Exception:
@@ -265,19 +279,17 @@ async def handle_metronome_alerts(request: Request):
                             tokens = [t for t in tokens if t.lower() not in blacklist]
                             first_name = tokens[0].title() if tokens else 'there'
 
-                        asyncio.create_task(
-                            send_welcome_email(
-                                to=email_to,
-                                first_name=first_name,
-                                credits=int(credits_granted or 0),
-                                trial_days=settings.METRONOME_TRIAL_DAYS,
-                                trial_end_date=trial_end_str,
-                            )
+                        schedule_welcome_email(
+                            to=email_to,
+                            first_name=first_name,
+                            credits=int(credits_granted or 0),
+                            trial_days=settings.METRONOME_TRIAL_DAYS,
+                            trial_end_date=trial_end_str,
                         )
                     except Exception as e:
-                        print(f"❌ Failed to enqueue welcome email: {e}")
+                        logger.error("Failed to enqueue welcome email: %s", e)
                 else:
-                    print(f"⚠️ No email available for customer {customer_id}; skipping welcome email")
+                    logger.warning("No email available for customer %s; skipping welcome email", customer_id)
 
             # Additionally: if this is the demo conversion offset (start + PT3M), broadcast conversion push
             if offset_duration == 'PT3M':
@@ -285,7 +297,7 @@ async def handle_metronome_alerts(request: Request):
                     # Compute end for banner context
                     end_str = None
                     try:
-                        balances = await metronome_client.list_customer_balances(customer_id)
+                        balances = await metronome.list_customer_balances(customer_id)
                         items = balances.get('data', [])
                         target_end_dt = None
                         for entry in items:
@@ -300,33 +312,31 @@ async def handle_metronome_alerts(request: Request):
                                 target_end_dt = target_end_dt.replace(tzinfo=_tz.utc)
                             end_str = target_end_dt.strftime('%b %d, %Y %H:%M UTC')
                     except Exception as e:
-                        print(f"⚠️ Could not compute end_at for conversion push: {e}")
+                        logger.warning("Could not compute end_at for conversion push: %s", e)
 
-                    await broadcast_event(customer_id, {
+                    background_tasks.add_task(broadcast_event, customer_id, {
                         "type": "trial_conversion_push",
                         "days_left": 3,
                         "end_at_utc": end_str,
                         "promo": "TRIAL20",
                         "timestamp": datetime.now().isoformat()
                     })
-                    print("📣 Conversion push SSE broadcasted")
+                    logger.info("Conversion push SSE queued for %s", customer_id)
 
                     # Send conversion email as well
                     try:
                         target_email = email_to  # derived earlier
                         if target_email:
-                            asyncio.create_task(
-                                send_conversion_email(
-                                    to=target_email,
-                                    first_name=first_name,
-                                    days_left=3,
-                                    trial_end_date=end_str,
-                                )
+                            schedule_conversion_email(
+                                to=target_email,
+                                first_name=first_name,
+                                days_left=3,
+                                trial_end_date=end_str,
                             )
                     except Exception as ee:
-                        print(f"⚠️ Failed to enqueue conversion email: {ee}")
+                        logger.warning("Failed to enqueue conversion email: %s", ee)
                 except Exception as be:
-                    print(f"⚠️ Failed to broadcast conversion push: {be}")
+                    logger.warning("Failed to broadcast conversion push: %s", be)
 
         elif alert_type == 'commit.segment.end' and offset_duration in ('-P3D', '-PT72H'):
             # Production-style conversion push: 3 days before trial end
@@ -335,7 +345,7 @@ async def handle_metronome_alerts(request: Request):
             # Try compute end string
             end_str = None
             try:
-                balances = await metronome_client.list_customer_balances(customer_id)
+                balances = await metronome.list_customer_balances(customer_id)
                 items = balances.get('data', [])
                 target_end_dt = None
                 for entry in items:
@@ -355,9 +365,9 @@ async def handle_metronome_alerts(request: Request):
                         target_end_dt = target_end_dt.replace(tzinfo=_tz.utc)
                     end_str = target_end_dt.strftime('%b %d, %Y %H:%M UTC')
             except Exception as e:
-                print(f"⚠️ Could not compute end_at for prod conversion push: {e}")
+                logger.warning("Could not compute end_at for prod conversion push: %s", e)
 
-            await broadcast_event(customer_id, {
+            background_tasks.add_task(broadcast_event, customer_id, {
                 "type": "trial_conversion_push",
                 "days_left": 3,
                 "end_at_utc": end_str,
@@ -365,10 +375,10 @@ async def handle_metronome_alerts(request: Request):
                 "timestamp": datetime.now().isoformat()
             })
             # We could also send the conversion email here by reusing customer email derivation if needed
-            print("📣 Prod conversion push SSE broadcasted")
+            logger.info("Prod conversion push SSE queued for %s", customer_id)
 
         else:
-            print(f"ℹ️  UNKNOWN ALERT TYPE: {alert_type}")
+            logger.info("Unhandled alert type: %s", alert_type)
         
         # Always return success to acknowledge receipt
         return {
@@ -379,7 +389,7 @@ async def handle_metronome_alerts(request: Request):
         }
         
     except Exception as e:
-        print(f"❌ Alert webhook processing error: {e}")
+        logger.error("Alert webhook processing error: %s", e)
         # Still return 200 to avoid retries for malformed requests
         return {
             "status": "error",
@@ -413,22 +423,19 @@ async def handle_metronome_invoices(request: Request):
             if not signature or not verify_webhook_signature(signature, date_header, raw_body, secret):
                 raise HTTPException(status_code=401, detail="Invalid webhook signature")
             try:
-                webhook_data = json.loads(raw_body.decode("utf-8") or "{}")
+                webhook_data = orjson.loads(raw_body) if raw_body.strip() else {}
             except Exception:
                 webhook_data = {}
         else:
-            webhook_data = await request.json()
+            webhook_data = orjson.loads(await request.body())
         
-        # 🔍 COMPREHENSIVE WEBHOOK LOGGING
-        print("=" * 70)
-        print("🔔 METRONOME INVOICE WEBHOOK RECEIVED:")
-        print(f"   Webhook ID: {webhook_data.get('id')}")
-        print(f"   Type: {webhook_data.get('type')}")
-        print(f"   Timestamp: {headers.get('date')}")
-        print(f"   Properties: {json.dumps(webhook_data.get('properties', {}), indent=2)}")
-        safe_headers = {k: headers.get(k) for k in ["date", "user-agent", "content-type"] if headers.get(k)}
-        print(f"   Header summary: {safe_headers}")
-        print("=" * 70)
+        logger.info(
+            "Metronome invoice webhook received: id=%s type=%s date=%s",
+            webhook_data.get('id'), webhook_data.get('type'), headers.get('date'),
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            safe_headers = {k: headers.get(k) for k in ["date", "user-agent", "content-type"] if headers.get(k)}
+            logger.debug("Invoice properties: %s headers: %s", _pretty_json(webhook_data.get('properties', {})), safe_headers)
         
         # Handle specific invoice types
         invoice_type = webhook_data.get('type')
@@ -439,10 +446,7 @@ async def handle_metronome_invoices(request: Request):
             customer_id = properties.get('customer_id')
             finalized_date = properties.get('invoice_finalized_date')
             
-            print(f"✅ INVOICE FINALIZED:")
-            print(f"   Invoice: {invoice_id}")
-            print(f"   Customer: {customer_id}")
-            print(f"   Finalized: {finalized_date}")
+            logger.info("Invoice finalized: invoice=%s customer=%s at=%s", invoice_id, customer_id, finalized_date)
             
             # TODO: Update customer credit balance
             # await update_customer_credits(customer_id, invoice_id)
@@ -451,14 +455,12 @@ async def handle_metronome_invoices(request: Request):
             billing_provider = properties.get('billing_provider')
             error_message = properties.get('billing_provider_error')
             
-            print(f"❌ BILLING PROVIDER ERROR:")
-            print(f"   Provider: {billing_provider}")
-            print(f"   Error: {error_message}")
+            logger.error("Billing provider error: provider=%s error=%s", billing_provider, error_message)
             
             # TODO: Handle billing errors (notify customer, retry, etc.)
             
         else:
-            print(f"ℹ️  UNKNOWN INVOICE TYPE: {invoice_type}")
+            logger.info("Unhandled invoice type: %s", invoice_type)
         
         # Always return success to acknowledge receipt
         return {
@@ -469,7 +471,7 @@ async def handle_metronome_invoices(request: Request):
         }
         
     except Exception as e:
-        print(f"❌ Invoice webhook processing error: {e}")
+        logger.error("Invoice webhook processing error: %s", e)
         # Still return 200 to avoid retries for malformed requests
         return {
             "status": "error",
@@ -505,20 +507,18 @@ async def handle_metronome_payment_gating(request: Request):
             if not signature or not verify_webhook_signature(signature, date_header, raw_body, secret):
                 raise HTTPException(status_code=401, detail="Invalid webhook signature")
             try:
-                webhook_data = json.loads(raw_body.decode("utf-8") or "{}")
+                webhook_data = orjson.loads(raw_body) if raw_body.strip() else {}
             except Exception:
                 webhook_data = {}
         else:
-            webhook_data = await request.json()
+            webhook_data = orjson.loads(await request.body())
         
-        # 🔍 COMPREHENSIVE WEBHOOK LOGGING
-        print("=" * 70)
-        print("🔔 METRONOME PAYMENT GATING WEBHOOK RECEIVED:")
-        print(f"   Webhook ID: {webhook_data.get('id')}")
-        print(f"   Type: {webhook_data.get('type')}")
-        print(f"   Timestamp: {headers.get('date')}")
-        print(f"   Properties: {json.dumps(webhook_data.get('properties', {}), indent=2)}")
-        print("=" * 70)
+        logger.info(
+            "Metronome payment gating webhook received: id=%s type=%s date=%s",
+            webhook_data.get('id'), webhook_data.get('type'), headers.get('date'),
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Payment gating properties: %s", _pretty_json(webhook_data.get('properties', {})))
         
         # Handle payment gating events
         payment_type = webhook_data.get('type')
@@ -528,21 +528,19 @@ async def handle_metronome_payment_gating(request: Request):
             payment_status = properties.get('payment_status')
             customer_id = properties.get('customer_id')
             
-            print(f"💳 PAYMENT STATUS UPDATE:")
-            print(f"   Customer: {customer_id}")
-            print(f"   Status: {payment_status}")
+            logger.info("Payment status update: customer=%s status=%s", customer_id, payment_status)
             
             if payment_status == 'failed':
                 error_message = properties.get('error_message')
-                print(f"   Error: {error_message}")
+                logger.warning("Payment failed for customer %s: %s", customer_id, error_message)
                 # TODO: Handle payment failure
                 
             elif payment_status == 'succeeded':
-                print(f"   ✅ Payment successful")
                 # TODO: Handle payment success
+                pass
         
         else:
-            print(f"ℹ️  PAYMENT GATING TYPE: {payment_type}")
+            logger.info("Unhandled payment gating type: %s", payment_type)
         
         return {
             "status": "received",
@@ -552,7 +550,7 @@ async def handle_metronome_payment_gating(request: Request):
         }
         
     except Exception as e:
-        print(f"❌ Payment gating webhook processing error: {e}")
+        logger.error("Payment gating webhook processing error: %s", e)
         return {
             "status": "error",
             "message": f"Failed to process payment gating webhook: {str(e)}"
@@ -566,14 +564,11 @@ async def handle_metronome_test(request: Request):
     """
     try:
         headers = {k.lower(): v for k, v in dict(request.headers).items()}
-        webhook_data = await request.json()
+        webhook_data = orjson.loads(await request.body())
         
-        print("=" * 70)
-        print("🧪 METRONOME TEST WEBHOOK RECEIVED:")
-        print(f"   Full Data: {json.dumps(webhook_data, indent=2)}")
+        # Debugging endpoint: logging the payload is its whole purpose
         safe_headers = {k: headers.get(k) for k in ["date", "user-agent", "content-type"] if headers.get(k)}
-        print(f"   Header summary: {safe_headers}")
-        print("=" * 70)
+        logger.info("Metronome test webhook received: %s headers: %s", _pretty_json(webhook_data), safe_headers)
         
         return {
             "status": "received",
@@ -581,7 +576,7 @@ async def handle_metronome_test(request: Request):
         }
         
     except Exception as e:
-        print(f"❌ Test webhook error: {e}")
+        logger.error("Test webhook error: %s", e)
         return {
             "status": "error",
             "message": f"Test webhook failed: {str(e)}"
@@ -593,60 +588,43 @@ async def customer_events(customer_id: str):
     Server-Sent Events endpoint for real-time customer notifications
     ✅ FIXED: Added proper SSE headers and CORS support
     """
-    print(f"🔥 SSE ENDPOINT CALLED for customer: {customer_id}")
-    
     async def event_stream():
-        print(f"🔥 EVENT STREAM STARTING for customer: {customer_id}")
-        
         # Create a queue for this connection
-        queue = asyncio.Queue()
+        queue = asyncio.Queue(maxsize=SSE_QUEUE_MAXSIZE)
         
         # Add to active connections
         if customer_id not in active_connections:
             active_connections[customer_id] = set()
         active_connections[customer_id].add(queue)
         
-        print(f"🔌 SSE connection opened for customer {customer_id}")
-        print(f"🔥 ABOUT TO YIELD INITIAL EVENT")
+        logger.info("SSE connection opened for customer %s", customer_id)
         
         try:
             # Send initial connection event
-            initial_data = json.dumps({'type': 'connected', 'message': 'Real-time updates active'})
-            initial_event = f"data: {initial_data}\n\n"
-            print(f"🔥 YIELDING: {initial_event}")
-            yield initial_event
-            
-            print(f"🔥 INITIAL EVENT YIELDED, STARTING EVENT LOOP")
+            yield CONNECTED_FRAME
             
             # Listen for events
             while True:
                 try:
                     # Wait for event with timeout to send keep-alive
                     event_data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    event_str = f"data: {json.dumps(event_data)}\n\n"
-                    print(f"🔥 YIELDING EVENT: {event_str}")
-                    yield event_str
+                    logger.debug("SSE event for customer %s: %s", customer_id, event_data.get("type"))
+                    yield b"data: " + orjson.dumps(event_data) + b"\n\n"
                 except asyncio.TimeoutError:
                     # Send keep-alive ping
-                    ping_data = json.dumps({'type': 'ping'})
-                    ping_event = f"data: {ping_data}\n\n"
-                    print(f"🔥 YIELDING PING: {ping_event}")
-                    yield ping_event
+                    yield PING_FRAME
                     
         except asyncio.CancelledError:
             # Connection closed
-            print(f"🔌 SSE connection closed for customer {customer_id}")
-        except Exception as e:
-            print(f"❌ SSE ERROR: {e}")
+            logger.info("SSE connection closed for customer %s", customer_id)
+        except Exception:
+            logger.exception("SSE stream error for customer %s", customer_id)
         finally:
             # Clean up connection
             if customer_id in active_connections:
                 active_connections[customer_id].discard(queue)
                 if not active_connections[customer_id]:
                     del active_connections[customer_id]
-            print(f"🔥 SSE CLEANUP COMPLETE for customer {customer_id}")
-    
-    print(f"🔥 RETURNING STREAMING RESPONSE")
     
     # ✅ FIXED: Return StreamingResponse with proper SSE headers
     return StreamingResponse(
@@ -665,22 +643,97 @@ async def customer_events(customer_id: str):
         }
     )
 
+def _put_drop_oldest(queue: asyncio.Queue, event_data: dict) -> None:
+    try:
+        queue.put_nowait(event_data)
+    except asyncio.QueueFull:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        queue.put_nowait(event_data)
+
+
+def _deliver_local(customer_id: str, event_data: dict) -> None:
+    queues = list(active_connections.get(customer_id, ()))
+    if not queues:
+        logger.debug("No active SSE connections for customer %s", customer_id)
+        return
+    logger.debug("Broadcasting to %d SSE connections for customer %s", len(queues), customer_id)
+    for queue in queues:
+        _put_drop_oldest(queue, event_data)
+
+
 async def broadcast_event(customer_id: str, event_data: dict):
     """
-    Broadcast an event to all active connections for a customer
+    Broadcast an event to all active connections for a customer.
+    Queues are bounded, so puts never block; a full queue drops its oldest event.
+    When Redis is configured the event is published so all workers receive it.
     """
-    if customer_id in active_connections:
-        print(f"📡 Broadcasting to {len(active_connections[customer_id])} connections for customer {customer_id}")
-        # Send to all active connections for this customer
-        for queue in active_connections[customer_id]:
-            try:
-                await queue.put(event_data)
-            except Exception as e:
-                print(f"Failed to send event to queue: {e}")
-    else:
-        print(f"📡 No active connections for customer {customer_id}")
+    redis = get_redis()
+    if redis is not None:
+        try:
+            await redis.publish(f"{SSE_CHANNEL_PREFIX}{customer_id}", orjson.dumps(event_data))
+            return
+        except Exception:
+            logger.exception("Redis publish failed; delivering to local connections only")
+    _deliver_local(customer_id, event_data)
+
+
+def start_sse_relay() -> None:
+    """
+    Start this worker's Redis relay (no-op without REDIS_URL). Called from the
+    app lifespan, so events published before the first local SSE client
+    connects aren't lost to a channel nobody listens on.
+    """
+    global _sse_relay_task
+    if get_redis() is None:
+        return
+    if _sse_relay_task is None or _sse_relay_task.done():
+        _sse_relay_task = asyncio.create_task(_sse_relay())
+
+
+async def stop_sse_relay() -> None:
+    global _sse_relay_task
+    task, _sse_relay_task = _sse_relay_task, None
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def _sse_relay() -> None:
+    """Forward Redis-published SSE events to this worker's connections."""
+    redis = get_redis()
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.psubscribe(f"{SSE_CHANNEL_PREFIX}*")
+            async for message in pubsub.listen():
+                if message.get("type") != "pmessage":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                _deliver_local(channel[len(SSE_CHANNEL_PREFIX):], orjson.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("SSE Redis relay failed; resubscribing")
+            await asyncio.sleep(1.0)
+        finally:
+            await pubsub.aclose()
+
+
+@lru_cache(maxsize=4)
+def _hmac_template(secret_key: str) -> "hmac.HMAC":
+    # Keyed HMAC state; copy() per request skips re-running the key schedule
+    return hmac.new(secret_key.encode('utf-8'), None, hashlib.sha256)
+
 
-# TODO: Add webhook signature verification function
 def verify_webhook_signature(signature: str, date_header: str, body: bytes, secret_key: str) -> bool:
     """
     Verify Metronome webhook signature
@@ -688,19 +741,15 @@ def verify_webhook_signature(signature: str, date_header: str, body: bytes, secr
     Formula: HMAC_SHA256(secret_key, DATE_HEADER + "\n" + BODY)
     """
     try:
-        # Construct the payload for HMAC
-        payload = f"{date_header}\n{body.decode('utf-8')}"
-        
-        # Compute HMAC-SHA256
-        expected_signature = hmac.new(
-            secret_key.encode('utf-8'),
-            payload.encode('utf-8'), 
-            hashlib.sha256
-        ).hexdigest()
+        mac = _hmac_template(secret_key).copy()
+        mac.update(date_header.encode('utf-8'))
+        mac.update(b"\n")
+        mac.update(body)
+        return hmac.compare_digest(signature, mac.hexdigest())
         
-        # Compare signatures
-        return hmac.compare_digest(signature, expected_signature)
-        
-    except Exception as e:
-        print(f"❌ Signature verification error: {e}")
+    except (TypeError, ValueError):
+        # compare_digest raises TypeError for a non-ASCII signature header and
+        # encode() raises UnicodeEncodeError (a ValueError) for an unencodable
+        # date header; nothing is hex/base64-decoded, so binascii.Error can't occur
+        logger.exception("Webhook signature verification error")
         return False
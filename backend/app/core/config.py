@@ -3,7 +3,7 @@ Vocalis SaaS Configuration
 Environment-based settings management
 """
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 class Settings(BaseSettings):
@@ -18,6 +18,20 @@ class Settings(BaseSettings):
     METRONOME_RATE_CARD_NAME: Optional[str] = None
     # Custom pricing unit for Vocalis credits (override in .env if different)
     VOCALIS_CREDIT_TYPE_ID: str = "21984655-5f0c-4161-973e-bdc5d2ecd530"
+    # Connection pool for direct Metronome HTTP calls
+    METRONOME_POOL_MAX: int = 100
+    METRONOME_POOL_KEEPALIVE: int = 50
+    METRONOME_KEEPALIVE_EXPIRY: float = 60.0
+    # Usage ingest: send when this many events are queued or the window (seconds) elapses
+    METRONOME_USAGE_BATCH_MAX: int = 200
+    METRONOME_USAGE_BATCH_LINGER: float = 0.1
+    # Events waiting to be batched; background submits are dropped beyond this
+    METRONOME_USAGE_QUEUE_MAX: int = 10_000
+    # Max Metronome requests in flight across all endpoints (keep <= METRONOME_POOL_MAX)
+    METRONOME_MAX_CONCURRENCY: int = 64
+    # Client-side request rate limit (requests/minute, 0 disables) and burst size
+    METRONOME_RPM: int = 6000
+    METRONOME_BURST: int = 100
 
     # Plans
     METRONOME_PLAN_CREATOR_DOLLARS: int = 49
@@ -42,6 +56,9 @@ class Settings(BaseSettings):
     
     # Database (for future use)
     DATABASE_URL: Optional[str] = None
+
+    # Redis (optional): shares SSE events and cached balances across workers when set
+    REDIS_URL: Optional[str] = None
     
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
@@ -49,8 +66,8 @@ class Settings(BaseSettings):
     # Webhooks
     METRONOME_WEBHOOK_SECRET: Optional[str] = None
     
-    class Config:
-        # Load env from the project root (../.env) when running with CWD=backend
-        env_file = "../.env"
+    # Load env from the project root (../.env) when running with CWD=backend.
+    # Frozen: settings are read-only after startup.
+    model_config = SettingsConfigDict(env_file="../.env", frozen=True)
 
 settings = Settings()
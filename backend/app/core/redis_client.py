@@ -0,0 +1,33 @@
+"""
+Shared Redis connection
+Optional: only used when REDIS_URL is configured
+"""
+
+from typing import Any, Optional
+
+from app.core.config import settings
+
+_redis: Optional[Any] = None
+
+
+def get_redis() -> Optional[Any]:
+    """Return the process-wide async Redis client, or None when REDIS_URL is unset."""
+    global _redis
+    if not settings.REDIS_URL:
+        return None
+    if _redis is None:
+        try:
+            import redis.asyncio as redis  # type: ignore
+        except Exception as e:  # ImportError
+            raise RuntimeError(
+                "REDIS_URL is set but redis is not installed. Please `pip install redis`."
+            ) from e
+        _redis = redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
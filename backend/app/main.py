@@ -3,6 +3,8 @@ Vocalis SaaS - FastAPI Main Application
 AI Voice Generation with Metronome Billing Integration
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -11,13 +13,33 @@ import uvicorn
 
 from .api import auth, billing, usage, webhooks, health
 from .core.config import settings
+from .core.redis_client import close_redis
+from .services.metronome import shared_metronome_client
+from .utils import user_store
+from .utils.email import close_email_clients
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await user_store.init_db()
+    # Routes get the client through Depends(get_metronome_client)
+    app.state.metronome = shared_metronome_client()
+    webhooks.start_sse_relay()
+    yield
+    await webhooks.stop_sse_relay()
+    # Release pooled upstream connections on shutdown
+    await app.state.metronome.aclose()
+    await close_email_clients()
+    await close_redis()
+    user_store.close_db()
 
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Vocalis SaaS API",
     description="AI Voice Generation with Metronome Billing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -29,6 +51,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Liveness probe answered before routing: /health is polled constantly
+HEALTH_BODY = b'{"status":"healthy","service":"vocalis-saas"}'
+HEALTH_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(HEALTH_BODY)).encode()),
+]
+
+
+class HealthCheckMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/health":
+            await send({"type": "http.response.start", "status": 200, "headers": HEALTH_HEADERS})
+            await send({"type": "http.response.body", "body": HEALTH_BODY})
+            return
+        await self.app(scope, receive, send)
+
+
+# Added last so it is the outermost layer
+app.add_middleware(HealthCheckMiddleware)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="../frontend/static"), name="static")
 templates = Jinja2Templates(directory="../frontend/templates")
@@ -41,35 +86,54 @@ app.include_router(webhooks.router, prefix="/api/webhooks", tags=["Webhooks"])
 app.include_router(health.router, prefix="/health", tags=["Health"]) 
 
 # Frontend routes
-from fastapi import Request
+import hashlib
+from typing import Dict, Tuple
+from fastapi import Request, Response
 from fastapi.responses import HTMLResponse
+from .pages import PAGES
+
+# Page shells are static (data is loaded by frontend JavaScript), so they are
+# rendered once at startup and served with an ETag for 304 revalidation.
+PAGE_CACHE_CONTROL = "public, max-age=60"
+
+
+def _prerender(template_name: str, **context) -> Tuple[bytes, str]:
+    body = templates.get_template(template_name).render(**context).encode("utf-8")
+    etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+    return body, etag
+
+
+_PAGES: Dict[str, Tuple[bytes, str]] = {
+    name: _prerender(f"pages/{name}.html", **context) for name, context in PAGES.items()
+}
+
+
+def _page_response(request: Request, page: str) -> Response:
+    body, etag = _PAGES[page]
+    headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
 
 @app.get("/", response_class=HTMLResponse)
 async def landing_page(request: Request):
-    return templates.TemplateResponse("pages/landing.html", {"request": request})
+    return _page_response(request, "landing")
 
 @app.get("/signup", response_class=HTMLResponse)
 async def signup_page(request: Request):
-    return templates.TemplateResponse("pages/signup.html", {"request": request})
+    return _page_response(request, "signup")
 
 @app.get("/billing", response_class=HTMLResponse)
 async def billing_page(request: Request):
-    return templates.TemplateResponse("pages/billing.html", {"request": request})
+    return _page_response(request, "billing")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard_page(request: Request):
     """
     Dashboard page - balance will be loaded by frontend JavaScript
     """
-    return templates.TemplateResponse("pages/dashboard.html", {
-        "request": request,
-        "balance": 0  # Placeholder - real balance loaded by JavaScript
-    })
-
-
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "vocalis-saas"}
+    return _page_response(request, "dashboard")
 
 
 # SSE endpoints are provided under the webhooks router
@@ -0,0 +1,16 @@
+"""
+Page shells served by the frontend routes
+Shared by app/main.py, simple-main.py and scripts/build_pages.py so the three
+render pages with the same context.
+"""
+
+from typing import Any, Dict
+
+# Page name -> template context; data is loaded by frontend JavaScript
+PAGES: Dict[str, Dict[str, Any]] = {
+    "landing": {},
+    "signup": {},
+    "billing": {},
+    # Placeholder - real balance loaded by JavaScript
+    "dashboard": {"balance": 0},
+}
@@ -2,7 +2,49 @@
 Public entry point for the Metronome client instance (SDK-only).
 """
 
+from functools import lru_cache
+from typing import Any
+
+from .errors import (
+    MetronomeAuthError,
+    MetronomeError,
+    MetronomeRateLimited,
+    MetronomeSchemaError,
+    MetronomeTimeout,
+    MetronomeTransientError,
+    MetronomeUnavailable,
+    UPSTREAM_UNAVAILABLE,
+)
 from .sdk_client import SdkMetronomeClient
 
-# Backwards-compatible exported name used across the codebase
-metronome_client = SdkMetronomeClient()
+# metronome_client (see __getattr__) is left out so a star import doesn't
+# construct the client
+__all__ = [
+    "MetronomeAuthError",
+    "MetronomeError",
+    "MetronomeRateLimited",
+    "MetronomeSchemaError",
+    "MetronomeTimeout",
+    "MetronomeTransientError",
+    "MetronomeUnavailable",
+    "SdkMetronomeClient",
+    "UPSTREAM_UNAVAILABLE",
+    "shared_metronome_client",
+]
+
+
+@lru_cache(maxsize=1)
+def shared_metronome_client() -> SdkMetronomeClient:
+    """
+    The one app-wide instance, built on first use (at app startup) rather than
+    at import, so importing the app doesn't require METRONOME_API_KEY. Routes
+    reach it through app.state (see app.api.deps).
+    """
+    return SdkMetronomeClient()
+
+
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible `metronome_client` name, resolved lazily
+    if name == "metronome_client":
+        return shared_metronome_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
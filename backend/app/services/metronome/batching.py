@@ -0,0 +1,150 @@
+"""
+Usage event micro-batching.
+Coalesces events submitted within a short window into one ingest call.
+submit() waits for (and sees errors from) its own batch; submit_nowait()
+returns at once and only logs failures. When Metronome rejects a batch
+outright (a 4xx validation error), its events are resent one by one so a
+single malformed event can't take the rest of the batch down with it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .errors import status_code_of
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+# Queue marker asking the worker to send what it holds right away
+_FLUSH = object()
+
+
+class UsageBatcher:
+    def __init__(
+        self,
+        send: Callable[[List[Event]], Awaitable[None]],
+        max_batch: int = 200,
+        linger: float = 0.1,
+        max_queue: int = 10_000,
+    ) -> None:
+        self._send = send
+        self.max_batch = max_batch
+        self.linger = linger
+        self.max_queue = max_queue
+        # Events refused by submit_nowait because the queue was full
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, event: Event) -> None:
+        """Queue an event and wait until the batch containing it is ingested."""
+        fut = asyncio.get_running_loop().create_future()
+        await self._ensure_worker().put((event, fut))
+        await fut
+
+    def submit_nowait(self, event: Event) -> bool:
+        """
+        Queue an event without waiting for it to be sent. Returns False (and
+        counts a drop) when the queue is full rather than blocking the caller.
+        """
+        queue = self._ensure_worker()
+        fut = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((event, fut))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(
+                "Usage queue full (%d events), dropped event %s (%d dropped so far)",
+                self.max_queue, event.get("transaction_id"), self.dropped,
+            )
+            return False
+        fut.add_done_callback(_log_background_failure)
+        return True
+
+    async def flush(self) -> None:
+        """Send everything queued so far without waiting for the linger window."""
+        if self._worker is None or self._worker.done():
+            return
+        fut = asyncio.get_running_loop().create_future()
+        await self._ensure_worker().put((_FLUSH, fut))
+        await fut
+
+    async def aclose(self) -> None:
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return self._queue
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            batch: List[Tuple[Any, asyncio.Future]] = [await queue.get()]
+            deadline = loop.time() + self.linger
+            while batch[-1][0] is not _FLUSH and len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        events = [item for item, _ in batch if item is not _FLUSH]
+        error: Optional[BaseException] = None
+        if events:
+            try:
+                await self._send(events)
+            except Exception as e:
+                error = e
+        if error is not None and len(events) > 1 and _is_rejected(error):
+            logger.warning("Usage batch of %d rejected (%s), resending events individually", len(events), error)
+            await self._send_each(batch)
+            error = None
+        for item, fut in batch:
+            if fut.done():
+                continue
+            if error is not None and item is not _FLUSH:
+                fut.set_exception(error)
+            else:
+                fut.set_result(None)
+
+
+    async def _send_each(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        for item, fut in batch:
+            if item is _FLUSH or fut.done():
+                continue
+            try:
+                await self._send([item])
+            except Exception as e:
+                fut.set_exception(e)
+            else:
+                fut.set_result(None)
+
+
+def _is_rejected(exc: BaseException) -> bool:
+    """Metronome refused the request's content, as opposed to being down, throttling or unauthorized."""
+    code = status_code_of(exc)
+    return code is not None and 400 <= code < 500 and code not in (401, 403, 429)
+
+
+def _log_background_failure(fut: asyncio.Future) -> None:
+    if not fut.cancelled() and fut.exception() is not None:
+        logger.error("Background usage ingest failed: %s", fut.exception())
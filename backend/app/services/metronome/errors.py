@@ -0,0 +1,102 @@
+"""
+Typed errors raised by the Metronome client.
+Callers (and the retry/circuit-breaker logic) branch on the class instead
+of parsing messages; the original SDK/httpx error is kept as __cause__.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Optional, Type
+
+import httpx
+
+try:
+    from metronome import APITimeoutError as _SdkTimeoutError  # type: ignore
+    from metronome import APIConnectionError as _SdkConnectionError  # type: ignore
+except Exception:  # ImportError
+    _SdkTimeoutError = ()  # type: ignore[assignment]
+    _SdkConnectionError = ()  # type: ignore[assignment]
+
+
+class MetronomeError(RuntimeError):
+    """
+    A Metronome call failed; `status_code` is set when Metronome answered and
+    `retry_after` (seconds) when it sent a Retry-After header.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class MetronomeAuthError(MetronomeError):
+    """401/403: bad or unauthorized API key. Never retried."""
+
+
+class MetronomeRateLimited(MetronomeError):
+    """429 from Metronome."""
+
+
+class MetronomeTimeout(MetronomeError):
+    """The request timed out before Metronome answered."""
+
+
+class MetronomeTransientError(MetronomeError):
+    """5xx or a dropped connection; worth retrying."""
+
+
+class MetronomeSchemaError(MetronomeError):
+    """Metronome answered, but not in the documented shape; never guessed around."""
+
+
+class MetronomeUnavailable(MetronomeError):
+    """Raised without calling Metronome while an endpoint's circuit is open."""
+
+
+class BulkheadFull(MetronomeError):
+    """Raised instead of queueing when a bulkhead's wait queue is already full."""
+
+
+# Metronome can't serve the request right now; API routes answer 503 for these
+UPSTREAM_UNAVAILABLE = (
+    MetronomeUnavailable,
+    MetronomeTransientError,
+    MetronomeTimeout,
+    MetronomeRateLimited,
+    BulkheadFull,
+)
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK/httpx error, if any."""
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def error_class_for_status(status_code: Optional[int]) -> Type[MetronomeError]:
+    if status_code in (401, 403):
+        return MetronomeAuthError
+    if status_code == 429:
+        return MetronomeRateLimited
+    if status_code is not None and status_code >= 500:
+        return MetronomeTransientError
+    return MetronomeError
+
+
+def to_metronome_error(exc: BaseException, context: str) -> MetronomeError:
+    """Wrap `exc` in the matching MetronomeError subclass; raise the result `from exc`."""
+    message = f"{context}: {exc}"
+    if isinstance(exc, MetronomeError):
+        return type(exc)(message, status_code=exc.status_code, retry_after=exc.retry_after)
+    code = status_code_of(exc)
+    if isinstance(exc, (httpx.TimeoutException, asyncio.TimeoutError, _SdkTimeoutError)):
+        cls: Type[MetronomeError] = MetronomeTimeout
+    elif code is None and isinstance(exc, (httpx.TransportError, _SdkConnectionError)):
+        cls = MetronomeTransientError
+    else:
+        cls = error_class_for_status(code)
+    return cls(message, status_code=code)
@@ -6,7 +6,7 @@ between the existing HTTP client and the SDK-backed client.
 
 from __future__ import annotations
 
-from typing import Protocol, Dict, Any, List, Optional
+from typing import Protocol, Dict, Any, List, Optional, Tuple
 
 
 class IMetronomeClient(Protocol):
@@ -22,13 +22,17 @@ class IMetronomeClient(Protocol):
     async def create_billing_contract(self, customer_id: str, contract_data: Dict[str, Any]) -> Dict[str, Any]:
         ...
 
-    async def get_customer_balance(self, customer_id: str) -> Dict[str, Any]:
+    async def get_customer_balance(
+        self, customer_id: str, force_refresh: bool = False, as_of: Optional[str] = None
+    ) -> Dict[str, Any]:
         ...
 
     async def list_customer_balances(self, customer_id: str) -> Dict[str, Any]:
         ...
 
-    async def ingest_usage_event(self, event_payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def ingest_usage_event(
+        self, event_payload: Dict[str, Any], immediate: bool = False, background: bool = False
+    ) -> Dict[str, Any]:
         ...
 
     async def record_usage_event(self, customer_id: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -43,6 +47,9 @@ class IMetronomeClient(Protocol):
     async def set_customer_aliases(self, customer_id: str, aliases: List[str]) -> Dict[str, Any]:
         ...
 
+    async def set_customer_aliases_bulk(self, items: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+        ...
+
     async def get_customer(self, customer_id: str) -> Dict[str, Any]:
         ...
 
@@ -0,0 +1,198 @@
+"""
+Resilience helpers for outbound Metronome calls.
+Retries are limited to rate limiting and transient upstream failures;
+auth and validation errors are raised immediately.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, TypeVar
+
+import httpx
+
+from .errors import (
+    BulkheadFull,
+    MetronomeRateLimited,
+    MetronomeTimeout,
+    MetronomeTransientError,
+    _SdkConnectionError,
+    status_code_of,
+)
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+
+def is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (MetronomeTransientError, MetronomeRateLimited, MetronomeTimeout)):
+        return True
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, _SdkConnectionError)):
+        return True
+    return status_code_of(exc) in RETRYABLE_STATUS
+
+
+def is_outage(exc: BaseException) -> bool:
+    """Failures that suggest the endpoint is down (not throttling or bad input)."""
+    if isinstance(exc, (MetronomeTransientError, MetronomeTimeout)):
+        return True
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, _SdkConnectionError)):
+        return True
+    code = status_code_of(exc)
+    return code is not None and code >= 500
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    value: Any = getattr(exc, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+    return parse_retry_after(value)
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        # HTTP-date form is not worth parsing here; fall back to backoff
+        return None
+
+
+async def with_retries(
+    op: Callable[[], Awaitable[T]],
+    label: str,
+    attempts: int = 4,
+    base: float = 0.25,
+    cap: float = 30.0,
+) -> T:
+    """Await op(), retrying transient failures with full-jitter exponential backoff."""
+    for attempt in range(attempts):
+        try:
+            return await op()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = random.uniform(0, min(cap, base * 2 ** attempt))
+            logger.warning(
+                "Metronome %s transient failure (attempt %d/%d), retrying in %.2fs: %s",
+                label, attempt + 1, attempts, delay, e,
+            )
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+class CircuitBreaker:
+    """
+    CLOSED -> OPEN after `failure_threshold` outage failures within `window`
+    seconds; OPEN -> HALF_OPEN after `reset_timeout`, letting one probe through.
+    A successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, window: float = 30.0, reset_timeout: float = 10.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._failures: Deque[float] = deque()
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures.clear()
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        if self._probe_in_flight:
+            self._probe_in_flight = False
+            self._opened_at = now
+            return
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window:
+            self._failures.popleft()
+        if len(self._failures) >= self.failure_threshold:
+            self._opened_at = now
+            self._failures.clear()
+
+    def release_probe(self) -> None:
+        """Forget an in-flight probe that ended without an outcome (e.g. cancelled)."""
+        self._probe_in_flight = False
+
+
+class Bulkhead:
+    """Caps concurrent in-flight calls; at most `max_waiting` callers may queue."""
+
+    def __init__(self, name: str, limit: int, max_waiting: int = 1000) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self._sem = asyncio.Semaphore(limit)
+        self._waiting = 0
+
+    async def __aenter__(self) -> "Bulkhead":
+        if self._sem.locked():
+            if self._waiting >= self.max_waiting:
+                raise BulkheadFull(f"Metronome {self.name} bulkhead full ({self.limit} in flight, {self._waiting} waiting)")
+            self._waiting += 1
+            try:
+                await self._sem.acquire()
+            finally:
+                self._waiting -= 1
+        else:
+            await self._sem.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._sem.release()
+
+
+class TokenBucket:
+    """
+    Client-side rate limit: refills `rate_per_minute` tokens continuously,
+    holding at most `burst`. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: Optional[int] = None) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
@@ -6,22 +6,146 @@ to the official Metronome Python SDK where available.
 Note: SDK-first implementation. For one missing endpoint (threshold
 billing release), this client makes a minimal direct HTTP call using the
 same bearer token and base URL as the SDK. Replace with the official SDK
-method when available.
+method when available. Usage ingest uses the same direct path so event
+batches are serialized with orjson.
 """
 
 from __future__ import annotations
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, Iterable, TypeVar
+import asyncio
 import logging
+import time
 from datetime import datetime, timezone
+from functools import lru_cache
+
+import httpx
+import orjson
 
 from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.utils.ttl_cache import TTLCache
+from .batching import UsageBatcher
+from .errors import (
+    BulkheadFull,
+    MetronomeSchemaError,
+    MetronomeUnavailable,
+    UPSTREAM_UNAVAILABLE,
+    error_class_for_status,
+    status_code_of,
+    to_metronome_error,
+)
+from .resilience import Bulkhead, CircuitBreaker, TokenBucket, is_outage, parse_retry_after, with_retries
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Rate cards and products are catalog objects that rarely change
+RATE_CARD_CACHE_TTL = 3600.0
+PRODUCT_CACHE_TTL = 3600.0
+PREPAID_PRODUCT_CACHE_KEY = "product:prepaid"
+RATE_CARD_PAGE_SIZE = 100
+# Balances change with every usage event; keep hot accounts briefly
+BALANCE_CACHE_TTL = 5.0
+BALANCE_CACHE_MAXSIZE = 10_000
+# Contract window used when the caller doesn't supply one
+DEFAULT_CONTRACT_START = "2025-07-01T00:00:00.000Z"
+DEFAULT_CONTRACT_END = "2026-07-01T00:00:00.000Z"
+# Credit pricing: 1 cent = 40 credits. Kept integral so conversions are exact
+CREDITS_PER_CENT = 40
+# Metronome's built-in USD (cents) credit type
+USD_CENTS_CREDIT_TYPE_ID = "2714e483-4ff1-48e4-9e25-ac732e8f24f2"
+# Shared across workers when REDIS_URL is set
+BALANCE_REDIS_TTL = 3
+BALANCE_REDIS_PREFIX = "vocalis:balance:"
+# Last successful read per customer, served (tagged stale_fallback) while Metronome is down
+BALANCE_LAST_GOOD_TTL = 600
+# Concurrent in-flight SDK calls per bulkhead; endpoints not listed share "default"
+BULKHEAD_LIMITS = {"usage": 20, "contracts": 5, "default": 50}
+BULKHEAD_MAX_WAITING = 1000
+_BULKHEAD_BY_ENDPOINT = {"usage.ingest": "usage", "contracts.create": "contracts"}
+# Only this much of a failed response body is quoted in error messages
+ERROR_BODY_MAX = 2048
+
+
+@lru_cache(maxsize=1)
+def _iso_for_second(second: int) -> str:
+    return datetime.fromtimestamp(second, timezone.utc).isoformat()
+
+
+def _now_iso() -> str:
+    """Current UTC time as ISO text, formatted at most once per wall-clock second."""
+    return _iso_for_second(int(time.time()))
+
+
+def _now_iso_z() -> str:
+    """Current UTC time to the second, Z-suffixed, as Metronome expects for event timestamps."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _sum_balances(entries: List[Any]) -> Tuple[int, bool, int]:
+    """
+    Sum list_balances entries (Commit/Credit models) by credit type.
+    Returns (vocalis_credits, found_vocalis, usd_cents). Entries with no
+    access_schedule, credit type or balance (all optional in the SDK) are
+    skipped; a balance of the wrong type raises MetronomeSchemaError instead
+    of being guessed at.
+    """
+    # Hoisted: a pydantic settings lookup per entry adds up on long lists
+    vc_id = settings.VOCALIS_CREDIT_TYPE_ID
+    total_vc = 0
+    found_vc = False
+    usd_cents = 0
+    for entry in entries:
+        try:
+            schedule = entry.access_schedule
+            credit_type = schedule.credit_type if schedule is not None else None
+            raw_balance = entry.balance
+        except AttributeError as e:
+            raise MetronomeSchemaError(f"Unexpected balance entry shape: {e}") from e
+        if credit_type is None or raw_balance is None:
+            # Not tied to a credit type, or no balance computed yet (e.g. not started)
+            continue
+        ctid = credit_type.id
+        if not isinstance(raw_balance, (int, float)):
+            raise MetronomeSchemaError(f"Non-numeric balance {raw_balance!r} for credit type {ctid}")
+        if ctid == vc_id:
+            found_vc = True
+            total_vc += int(raw_balance)
+        elif ctid == USD_CENTS_CREDIT_TYPE_ID:
+            usd_cents += int(raw_balance)
+    return total_vc, found_vc, usd_cents
+
+
+def _warn_if_pool_exhausted(exc: BaseException, label: str) -> None:
+    """Make pool sizing observable: PoolTimeout means every connection was busy."""
+    if isinstance(exc, httpx.PoolTimeout) or isinstance(exc.__cause__, httpx.PoolTimeout):
+        logger.warning(
+            "Metronome %s waited too long for a pooled connection (max_connections=%d); "
+            "consider raising METRONOME_POOL_MAX",
+            label, settings.METRONOME_POOL_MAX,
+        )
+
 
 class SdkMetronomeClient:
+    # Fixed attribute set: no per-instance __dict__, slot loads on the hot call path
+    __slots__ = (
+        "_sdk",
+        "_http",
+        "_catalog_cache",
+        "_catalog_inflight",
+        "_balance_cache",
+        "_balance_last_good",
+        "_balance_inflight",
+        "_breakers",
+        "_bulkheads",
+        "_inflight",
+        "_limiter",
+        "_usage_batcher",
+    )
+
     def __init__(self) -> None:
         try:
             # Official SDK import
@@ -36,21 +160,127 @@ class SdkMetronomeClient:
         if not bearer:
             raise ValueError("METRONOME_API_KEY not configured in environment")
 
+        limits = httpx.Limits(
+            max_connections=settings.METRONOME_POOL_MAX,
+            max_keepalive_connections=settings.METRONOME_POOL_KEEPALIVE,
+            keepalive_expiry=settings.METRONOME_KEEPALIVE_EXPIRY,
+        )
+
         try:
             # The SDK expects 'bearer_token' and optional 'base_url'
-            self._sdk = AsyncMetronome(bearer_token=bearer, base_url=base_url)
+            # Retries are handled by _call so non-idempotent creates are never replayed
+            # Concurrent SDK calls multiplex over HTTP/2 instead of opening a socket each
+            self._sdk = AsyncMetronome(
+                bearer_token=bearer,
+                base_url=base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(limits=limits, http2=True),
+            )
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Metronome SDK client: {e}")
 
+        # Long-lived pooled client for the direct HTTP shim; keeps TLS
+        # connections warm instead of handshaking on every call
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {bearer}", "Content-Type": "application/json"},
+            # Fail fast on an unreachable host; reads may legitimately take longer
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=limits,
+            http2=True,
+        )
+
+        # Catalog ids keyed "rate_card:<normalized name>" / "product:prepaid"
+        # -> (id, fetched_at monotonic)
+        self._catalog_cache: Dict[str, Tuple[Any, float]] = {}
+        self._catalog_inflight: Dict[str, asyncio.Future] = {}
+        self._balance_cache = TTLCache(maxsize=BALANCE_CACHE_MAXSIZE, ttl=BALANCE_CACHE_TTL)
+        self._balance_last_good = TTLCache(maxsize=BALANCE_CACHE_MAXSIZE, ttl=BALANCE_LAST_GOOD_TTL)
+        # customer_id -> in-flight list_balances fetch shared by concurrent callers
+        self._balance_inflight: Dict[str, asyncio.Future] = {}
+        # One breaker per SDK endpoint so a failing resource doesn't block the others
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Bound concurrency so bursts queue here instead of stampeding Metronome
+        self._bulkheads: Dict[str, Bulkhead] = {
+            name: Bulkhead(name, limit, BULKHEAD_MAX_WAITING) for name, limit in BULKHEAD_LIMITS.items()
+        }
+        self._inflight = asyncio.BoundedSemaphore(settings.METRONOME_MAX_CONCURRENCY)
+        # Smooth bursts below Metronome's rate limit instead of collecting 429s
+        self._limiter: Optional[TokenBucket] = (
+            TokenBucket(settings.METRONOME_RPM, settings.METRONOME_BURST) if settings.METRONOME_RPM > 0 else None
+        )
+        self._usage_batcher = UsageBatcher(
+            self._ingest_batch,
+            max_batch=settings.METRONOME_USAGE_BATCH_MAX,
+            linger=settings.METRONOME_USAGE_BATCH_LINGER,
+            max_queue=settings.METRONOME_USAGE_QUEUE_MAX,
+        )
+
         logger.info("Initialized SdkMetronomeClient (Async)")
 
+    async def aclose(self) -> None:
+        # Send any queued usage before tearing down connections
+        await self._usage_batcher.aclose()
+        await self._http.aclose()
+        # Also closes the httpx client handed to the SDK
+        await self._sdk.close()
+
+    async def __aenter__(self) -> "SdkMetronomeClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _call(self, endpoint: str, op: Callable[[], Awaitable[T]], idempotent: bool = True) -> T:
+        """
+        Run one SDK request. Fails fast while the endpoint's circuit is open;
+        idempotent requests are retried on 429/5xx/network errors.
+        """
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker()
+        if not breaker.allow():
+            raise MetronomeUnavailable(f"Metronome {endpoint} is unavailable (circuit open)")
+        bulkhead = self._bulkheads[_BULKHEAD_BY_ENDPOINT.get(endpoint, "default")]
+
+        async def attempt() -> T:
+            if self._limiter is not None:
+                await self._limiter.acquire()
+            # Slots held per attempt, not across retry backoff sleeps. The
+            # global cap keeps the bulkheads together under the pool size.
+            async with bulkhead, self._inflight:
+                return await op()
+
+        try:
+            result = await (with_retries(attempt, label=endpoint) if idempotent else attempt())
+        except BulkheadFull:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            _warn_if_pool_exhausted(e, endpoint)
+            if is_outage(e):
+                breaker.record_failure()
+            else:
+                # Metronome answered (throttling or a 4xx): the endpoint is up
+                breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        breaker.record_success()
+        return result
+
     # ---- Customers ----
     async def create_customer(self, customer_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # Placeholder mapping; adjust to SDK's shape
-            resp = await self._sdk.v1.customers.create(  # type: ignore[attr-defined]
-                name=customer_data["name"],
-                ingest_aliases=[customer_data["external_id"]],
+            resp = await self._call(
+                "customers.create",
+                lambda: self._sdk.v1.customers.create(  # type: ignore[attr-defined]
+                    name=customer_data["name"],
+                    ingest_aliases=[customer_data["external_id"]],
+                ),
+                idempotent=False,
             )
             # Response type: CustomerCreateResponse with .data.id
             data = getattr(resp, "data", None) or resp
@@ -65,46 +295,149 @@ class SdkMetronomeClient:
                 "ingest_aliases": [customer_data["external_id"]],
             }
         except Exception as e:
-            raise RuntimeError(f"SDK create_customer failed: {e}")
+            raise to_metronome_error(e, "SDK create_customer failed") from e
 
     async def get_customer(self, customer_id: str) -> Dict[str, Any]:
         try:
-            resp = await self._sdk.v1.customers.retrieve(customer_id=customer_id)  # type: ignore[attr-defined]
+            resp = await self._call(
+                "customers.retrieve",
+                lambda: self._sdk.v1.customers.retrieve(customer_id=customer_id),  # type: ignore[attr-defined]
+            )
             data = getattr(resp, "data", None)
             # SDK BaseModel exposes model_dump(); fallback to dict-like
             if hasattr(data, "model_dump"):
                 return data.model_dump()
             return {"id": customer_id}
         except Exception as e:
-            raise RuntimeError(f"SDK get_customer failed: {e}")
+            raise to_metronome_error(e, "SDK get_customer failed") from e
 
     async def set_customer_aliases(self, customer_id: str, aliases: List[str]) -> Dict[str, Any]:
         try:
-            await self._sdk.v1.customers.set_ingest_aliases(customer_id=customer_id, ingest_aliases=aliases)  # type: ignore[attr-defined]
+            await self._call(
+                "customers.set_ingest_aliases",
+                lambda: self._sdk.v1.customers.set_ingest_aliases(customer_id=customer_id, ingest_aliases=aliases),  # type: ignore[attr-defined]
+            )
             return {"success": True, "customer_id": customer_id, "aliases": aliases}
         except Exception as e:
-            raise RuntimeError(f"SDK set_customer_aliases failed: {e}")
+            raise to_metronome_error(e, "SDK set_customer_aliases failed") from e
+
+    async def set_customer_aliases_bulk(self, items: List[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+        """
+        Set ingest aliases for several customers. Metronome has no batch
+        endpoint for this, so requests fan out concurrently; the default
+        bulkhead in _call bounds how many are in flight.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.set_customer_aliases(customer_id, aliases) for customer_id, aliases in items)
+            )
+        )
 
     # ---- Contract Pricing ----
+    async def _cached(self, key: str, ttl: float, fetch: Callable[[], Awaitable[Optional[T]]]) -> Optional[T]:
+        """
+        Catalog lookup cache. Concurrent callers on a miss share one in-flight
+        fetch, including its result when that is empty or an error; a failed
+        refresh serves the stale entry if there is one. Empty results are not
+        cached.
+        """
+        entry = self._catalog_cache.get(key)
+        if entry and time.monotonic() - entry[1] < ttl:
+            return entry[0]
+        inflight = self._catalog_inflight.get(key)
+        if inflight is not None:
+            # Shielded: a cancelled waiter must not cancel the shared fetch
+            return await asyncio.shield(inflight)
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it; don't warn about an unretrieved error
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._catalog_inflight[key] = fut
+        try:
+            try:
+                value = await fetch()
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning("Metronome lookup %s failed, serving stale value: %s", key, e)
+                value = entry[0]
+            else:
+                if value:
+                    self._catalog_cache[key] = (value, time.monotonic())
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(value)
+            return value
+        finally:
+            del self._catalog_inflight[key]
+
     async def get_rate_card(self, rate_card_name: Optional[str] = None) -> Optional[str]:
         try:
             rc_name = rate_card_name or settings.METRONOME_RATE_CARD_NAME
             if not rc_name:
                 raise ValueError("METRONOME_RATE_CARD_NAME is not set in environment")
             target = rc_name.strip().lower()
-            page = await self._sdk.v1.contracts.rate_cards.list(body={})  # type: ignore[attr-defined]
-            cards = getattr(page, "data", []) or []
-            for rc in cards:
-                name = getattr(rc, "name", "") or ""
-                if name.strip().lower() == target:
-                    return getattr(rc, "id", None)
-            return None
+            return await self._cached(f"rate_card:{target}", RATE_CARD_CACHE_TTL, lambda: self._find_rate_card(target))
         except Exception as e:
-            raise RuntimeError(f"SDK get_rate_card failed: {e}")
+            raise to_metronome_error(e, "SDK get_rate_card failed") from e
+
+    async def _find_rate_card(self, target: str) -> Optional[str]:
+        # The list endpoint has no name filter; walk cursor pages and
+        # stop at the first page containing the match. Every card seen on
+        # the way is cached too, so lookups by other names skip the walk.
+        cursor: Optional[str] = None
+        while True:
+            page = await self._call(
+                "rate_cards.list",
+                lambda: self._sdk.v1.contracts.rate_cards.list(  # type: ignore[attr-defined]
+                    body={}, limit=RATE_CARD_PAGE_SIZE, **({"next_page": cursor} if cursor else {})
+                ),
+            )
+            index: Dict[str, str] = {}
+            for rc in getattr(page, "data", []) or []:
+                name = (getattr(rc, "name", "") or "").strip().lower()
+                rc_id = getattr(rc, "id", None)
+                if rc_id and name not in index:
+                    index[name] = rc_id
+            fetched_at = time.monotonic()
+            for name, rc_id in index.items():
+                self._catalog_cache[f"rate_card:{name}"] = (rc_id, fetched_at)
+            if target in index:
+                return index[target]
+            cursor = getattr(page, "next_page", None)
+            if not cursor:
+                return None
+
+    def invalidate_rate_card(self, rate_card_name: Optional[str] = None) -> None:
+        """Drop a cached rate card id (all of them when no name is given)."""
+        if rate_card_name is None:
+            for key in [k for k in self._catalog_cache if k.startswith("rate_card:")]:
+                del self._catalog_cache[key]
+        else:
+            self._catalog_cache.pop(f"rate_card:{rate_card_name.strip().lower()}", None)
+
+    def reset_caches(self) -> None:
+        """Forget cached catalog ids and balances, e.g. after editing rate cards in Metronome."""
+        self._catalog_cache.clear()
+        self._balance_cache.clear()
 
     async def get_or_create_prepaid_product(self) -> str:
         try:
-            page = await self._sdk.v1.contracts.products.list()  # type: ignore[attr-defined]
+            return await self._cached(PREPAID_PRODUCT_CACHE_KEY, PRODUCT_CACHE_TTL, self._find_or_create_prepaid_product)
+        except Exception as e:
+            raise to_metronome_error(e, "SDK get_or_create_prepaid_product failed") from e
+
+    async def _find_or_create_prepaid_product(self) -> Optional[str]:
+        try:
+            page = await self._call(
+                "products.list",
+                lambda: self._sdk.v1.contracts.products.list(),  # type: ignore[attr-defined]
+            )
             products = getattr(page, "data", []) or []
             for p in products:
                 current = getattr(p, "current", None)
@@ -114,15 +447,32 @@ class SdkMetronomeClient:
         except Exception as e:
             logger.warning(f"SDK products.list failed (will try create): {e}")
 
-        try:
-            create_resp = await self._sdk.v1.contracts.products.create(  # type: ignore[attr-defined]
+        create_resp = await self._call(
+            "products.create",
+            lambda: self._sdk.v1.contracts.products.create(  # type: ignore[attr-defined]
                 name="Vocalis Credits",
                 type="FIXED",
-            )
-            data = getattr(create_resp, "data", None) or create_resp
-            return getattr(data, "id", None)
-        except Exception as e:
-            raise RuntimeError(f"SDK get_or_create_prepaid_product failed: {e}")
+            ),
+            idempotent=False,
+        )
+        data = getattr(create_resp, "data", None) or create_resp
+        return getattr(data, "id", None)
+
+    def _forget_missing_catalog_ids(self, exc: BaseException, rate_card_id: str, product_id: str) -> None:
+        """
+        A 404 from contract creation means a cached id was archived or deleted
+        upstream; drop it (both, if the error doesn't say which) so the next
+        attempt looks it up again instead of failing for the rest of the TTL.
+        """
+        if status_code_of(exc) != 404:
+            return
+        message = str(exc)
+        rate_card_named = rate_card_id in message
+        product_named = product_id in message
+        if rate_card_named or not product_named:
+            self.invalidate_rate_card()
+        if product_named or not rate_card_named:
+            self._catalog_cache.pop(PREPAID_PRODUCT_CACHE_KEY, None)
 
     async def list_products_readonly(self) -> List[Any]:
         """Read-only list of products via SDK. Returns the page data list.
@@ -130,24 +480,36 @@ class SdkMetronomeClient:
         Used by health checks to verify presence without creating anything.
         """
         try:
-            page = await self._sdk.v1.contracts.products.list()  # type: ignore[attr-defined]
+            page = await self._call(
+                "products.list",
+                lambda: self._sdk.v1.contracts.products.list(),  # type: ignore[attr-defined]
+            )
             return getattr(page, "data", []) or []
         except Exception as e:
-            raise RuntimeError(f"SDK list_products_readonly failed: {e}")
+            raise to_metronome_error(e, "SDK list_products_readonly failed") from e
 
     # ---- Contracts ----
     async def create_billing_contract(self, customer_id: str, contract_data: Dict[str, Any]) -> Dict[str, Any]:
         try:
-            rate_card_id = await self.get_rate_card(None)
+            # Independent lookups: overlap their round trips. Let both finish
+            # (a product created here is cached for next time) before
+            # surfacing the first failure.
+            rate_card_id, product_id = await asyncio.gather(
+                self.get_rate_card(None),
+                self.get_or_create_prepaid_product(),
+                return_exceptions=True,
+            )
+            for outcome in (rate_card_id, product_id):
+                if isinstance(outcome, BaseException):
+                    raise outcome
             if not rate_card_id:
                 raise RuntimeError(
                     f"Rate card not found by name '{settings.METRONOME_RATE_CARD_NAME}'. Configure METRONOME_RATE_CARD_NAME correctly in your environment."
                 )
-            product_id = await self.get_or_create_prepaid_product()
 
             credits_to_purchase = int(contract_data.get("credits", 0))
-            start_date = contract_data.get("start_date") or "2025-07-01T00:00:00.000Z"
-            end_date = contract_data.get("end_date") or "2026-07-01T00:00:00.000Z"
+            start_date = contract_data.get("start_date") or DEFAULT_CONTRACT_START
+            end_date = contract_data.get("end_date") or DEFAULT_CONTRACT_END
 
             payload = {
                 "customer_id": customer_id,
@@ -194,34 +556,43 @@ class SdkMetronomeClient:
             if payload.get("prepaid_balance_threshold_configuration"):
                 kwargs["prepaid_balance_threshold_configuration"] = payload["prepaid_balance_threshold_configuration"]
 
-            resp = await self._sdk.v1.contracts.create(  # type: ignore[attr-defined]
-                customer_id=customer_id,
-                starting_at=start_date,
-                ending_before=end_date,
-                name="Vocalis Credit Contract",
-                rate_card_id=rate_card_id,
-                commits=[
-                    {
-                        "product_id": product_id,
-                        "type": "PREPAID",
-                        "access_schedule": {
-                            "credit_type_id": settings.VOCALIS_CREDIT_TYPE_ID,
-                            "schedule_items": [
-                                {
-                                    "amount": credits_to_purchase,
-                                    "starting_at": start_date,
-                                    "ending_before": end_date,
-                                }
-                            ],
-                        },
-                    }
-                ],
-                **kwargs,
-            )
+            try:
+                resp = await self._call(
+                    "contracts.create",
+                    lambda: self._sdk.v1.contracts.create(  # type: ignore[attr-defined]
+                        customer_id=customer_id,
+                        starting_at=start_date,
+                        ending_before=end_date,
+                        name="Vocalis Credit Contract",
+                        rate_card_id=rate_card_id,
+                        commits=[
+                            {
+                                "product_id": product_id,
+                                "type": "PREPAID",
+                                "access_schedule": {
+                                    "credit_type_id": settings.VOCALIS_CREDIT_TYPE_ID,
+                                    "schedule_items": [
+                                        {
+                                            "amount": credits_to_purchase,
+                                            "starting_at": start_date,
+                                            "ending_before": end_date,
+                                        }
+                                    ],
+                                },
+                            }
+                        ],
+                        **kwargs,
+                    ),
+                    idempotent=False,
+                )
+            except Exception as e:
+                self._forget_missing_catalog_ids(e, rate_card_id, product_id)
+                raise
             data = getattr(resp, "data", None) or resp
             contract_id = getattr(data, "id", None)
             if not contract_id:
                 raise RuntimeError("SDK did not return a contract id")
+            await self._forget_balances([customer_id])
             return {
                 "id": contract_id,
                 "customer_id": customer_id,
@@ -232,145 +603,270 @@ class SdkMetronomeClient:
                 "status": "created",
             }
         except Exception as e:
-            raise RuntimeError(f"SDK create_billing_contract failed: {e}")
+            raise to_metronome_error(e, "SDK create_billing_contract failed") from e
 
     # ---- Balances ----
     async def list_customer_balances(self, customer_id: str) -> Dict[str, Any]:
         try:
-            payload = {
-                "customer_id": customer_id,
-                "include_balance": True,
-                "include_contract_balances": True,
-                "include_ledgers": False,
-            }
-            page = await self._sdk.v1.contracts.list_balances(**payload)  # type: ignore[attr-defined]
             # Normalize to dict
-            return {"data": getattr(page, "data", [])}
+            return {"data": await self._fetch_balance_entries(customer_id)}
         except Exception as e:
-            raise RuntimeError(f"SDK list_customer_balances failed: {e}")
+            raise to_metronome_error(e, "SDK list_customer_balances failed") from e
+
+    async def _fetch_balance_entries(self, customer_id: str, shared: bool = True) -> List[Any]:
+        """
+        list_balances entries for one customer. Concurrent callers (e.g. the
+        dashboard loading balance and trial status together) share one
+        in-flight request; shared=False always starts a fresh one, for reads
+        that must observe usage ingested after an earlier fetch began.
+        """
+        if shared:
+            inflight = self._balance_inflight.get(customer_id)
+            if inflight is not None:
+                # Shielded: a cancelled waiter must not cancel the shared fetch
+                return await asyncio.shield(inflight)
+
+        # Only computed balances are read; ledgers are the bulk of the
+        # response and would be downloaded and parsed for nothing
+        payload = {
+            "customer_id": customer_id,
+            "include_balance": True,
+            "include_ledgers": False,
+            "include_contract_balances": True,
+        }
+
+        async def fetch() -> List[Any]:
+            page = await self._call(
+                "contracts.list_balances",
+                lambda: self._sdk.v1.contracts.list_balances(**payload),  # type: ignore[attr-defined]
+            )
+            return list(getattr(page, "data", []) or [])
+
+        if not shared:
+            return await fetch()
 
-    async def get_customer_balance(self, customer_id: str) -> Dict[str, Any]:
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it; don't warn about an unretrieved error
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._balance_inflight[customer_id] = fut
         try:
-            payload = {
-                "customer_id": customer_id,
-                "include_balance": True,
-                "include_ledgers": True,
-                "include_contract_balances": True,
-            }
-            page = await self._sdk.v1.contracts.list_balances(**payload)  # type: ignore[attr-defined]
-            data = getattr(page, "data", [])
-
-            # Normalize to the same shape as the HTTP client
-            total_vc = 0
-            found_vc = False
-            usd_cents = 0
-            for entry in data or []:
-                # SDK returns typed models (Commit or Credit). Use attribute access.
-                ctid = None
-                raw_balance = 0
-                try:
-                    sched = getattr(entry, "access_schedule", None)
-                    ctype = getattr(sched, "credit_type", None) if sched is not None else None
-                    ctid = getattr(ctype, "id", None)
-                    raw_balance = getattr(entry, "balance", 0) or 0
-                except Exception:
-                    # Fallback for any dict-like responses
-                    ctid = (entry or {}).get("access_schedule", {}).get("credit_type", {}).get("id")  # type: ignore[attr-defined]
-                    raw_balance = (entry or {}).get("balance", 0) or 0  # type: ignore[attr-defined]
-
-                if ctid == settings.VOCALIS_CREDIT_TYPE_ID:
-                    found_vc = True
-                    total_vc += int(raw_balance)
-                elif ctid == "2714e483-4ff1-48e4-9e25-ac732e8f24f2":  # USD cents credit type
-                    usd_cents += int(raw_balance)
+            entries = await fetch()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(entries)
+            return entries
+        finally:
+            if self._balance_inflight.get(customer_id) is fut:
+                del self._balance_inflight[customer_id]
+
+    async def get_customer_balance(
+        self, customer_id: str, force_refresh: bool = False, as_of: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Current balance for one customer. `as_of` is used as last_updated
+        instead of reading the clock, so sweeps over many customers can
+        share one timestamp.
+        """
+        if not force_refresh:
+            cached = self._balance_cache.get(customer_id)
+            if cached is not None:
+                return dict(cached)
+            shared = await self._shared_balance_get(customer_id)
+            if shared is not None:
+                shared["source"] = "cache"
+                self._balance_cache.set(customer_id, shared)
+                return dict(shared)
+        try:
+            data = await self._fetch_balance_entries(customer_id, shared=not force_refresh)
+
+            total_vc, found_vc, usd_cents = _sum_balances(data)
 
             if found_vc:
                 balance = total_vc
                 currency = "VC"
-                dollar_value = balance * 0.00025
+                # Whole cents in integer math, so the value never shows sub-cent float noise
+                dollar_value = (balance // CREDITS_PER_CENT) / 100
             else:
-                balance = int(usd_cents / 0.025) if usd_cents > 0 else 0
+                balance = usd_cents * CREDITS_PER_CENT if usd_cents > 0 else 0
                 currency = "USD"
                 dollar_value = usd_cents / 100
 
-            return {
+            result = {
                 "customer_id": customer_id,
                 "balance": balance,
                 "currency": currency,
                 "dollar_value": dollar_value,
-                "last_updated": datetime.now().isoformat(),
+                "last_updated": as_of or _now_iso(),
                 "source": "metronome_sdk",
-                "credit_type_id": settings.VOCALIS_CREDIT_TYPE_ID if found_vc else "2714e483-4ff1-48e4-9e25-ac732e8f24f2",
+                "credit_type_id": settings.VOCALIS_CREDIT_TYPE_ID if found_vc else USD_CENTS_CREDIT_TYPE_ID,
                 "debug_info": {
                     "found_vocalis_credits": found_vc,
                     "vocalis_balance": total_vc,
                     "usd_balance_cents": usd_cents,
-                    "balance_entries_count": len(data or []),
+                    "balance_entries_count": len(data),
                 },
             }
+            self._balance_cache.set(customer_id, result)
+            self._balance_last_good.set(customer_id, result)
+            await self._shared_balance_set(customer_id, result)
+            return dict(result)
         except Exception as e:
-            raise RuntimeError(f"SDK get_customer_balance failed: {e}")
+            if isinstance(e, UPSTREAM_UNAVAILABLE) or is_outage(e):
+                stale = await self._last_good_balance(customer_id)
+                if stale is not None:
+                    logger.warning("Metronome balance read failed for %s, serving last good value: %s", customer_id, e)
+                    stale["source"] = "stale_fallback"
+                    return stale
+            raise to_metronome_error(e, "SDK get_customer_balance failed") from e
+
+    async def _last_good_balance(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        local = self._balance_last_good.get(customer_id)
+        if local is not None:
+            return dict(local)
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(BALANCE_REDIS_PREFIX + customer_id + ":last_good")
+        except Exception as e:
+            logger.warning("Redis last-good balance read failed: %s", e)
+            return None
+        return orjson.loads(raw) if raw else None
+
+    # Redis errors only cost a cache miss; balances are always refetchable
+    async def _shared_balance_get(self, customer_id: str) -> Optional[Dict[str, Any]]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(BALANCE_REDIS_PREFIX + customer_id)
+        except Exception as e:
+            logger.warning("Redis balance read failed: %s", e)
+            return None
+        return orjson.loads(raw) if raw else None
+
+    async def _shared_balance_set(self, customer_id: str, result: Dict[str, Any]) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        body = orjson.dumps(result)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(BALANCE_REDIS_PREFIX + customer_id, body, ex=BALANCE_REDIS_TTL)
+                pipe.set(BALANCE_REDIS_PREFIX + customer_id + ":last_good", body, ex=BALANCE_LAST_GOOD_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Redis balance write failed: %s", e)
+
+    async def _forget_balances(self, customer_ids: Iterable[Optional[str]]) -> None:
+        ids = [c for c in customer_ids if c]
+        for customer_id in ids:
+            self._balance_cache.pop(customer_id, None)
+        redis = get_redis()
+        if redis is None or not ids:
+            return
+        try:
+            await redis.delete(*(BALANCE_REDIS_PREFIX + c for c in ids))
+        except Exception as e:
+            logger.warning("Redis balance invalidation failed: %s", e)
 
     # ---- Usage ----
-    async def ingest_usage_event(self, event_payload: Dict[str, Any]) -> Dict[str, Any]:
+    async def ingest_usage_event(
+        self, event_payload: Dict[str, Any], immediate: bool = False, background: bool = False
+    ) -> Dict[str, Any]:
+        """Ingest one usage event.
+
+        Events are coalesced with others arriving within METRONOME_USAGE_BATCH_LINGER
+        into a single ingest call; this still waits for that call to finish.
+        Pass immediate=True to send on its own right away, or background=True
+        to return as soon as the event is queued (failures are only logged;
+        success is False if the queue is full and the event was dropped).
+        """
+        if background:
+            queued = self._usage_batcher.submit_nowait(event_payload)
+            return {
+                "success": queued,
+                "queued": queued,
+                "transaction_id": event_payload.get("transaction_id"),
+                "event_type": event_payload.get("event_type"),
+            }
         try:
-            # SDK typically expects an array for ingest
-            await self._sdk.v1.usage.ingest(usage=[event_payload])  # type: ignore[attr-defined]
+            if immediate:
+                await self._ingest_batch([event_payload])
+            else:
+                await self._usage_batcher.submit(event_payload)
             return {"success": True, "transaction_id": event_payload.get("transaction_id"), "event_type": event_payload.get("event_type")}
         except Exception as e:
-            raise RuntimeError(f"SDK ingest_usage_event failed: {e}")
+            raise to_metronome_error(e, "SDK ingest_usage_event failed") from e
+
+    async def flush_usage(self) -> None:
+        """Send queued usage events now instead of after the batch window."""
+        await self._usage_batcher.flush()
+
+    async def _ingest_batch(self, events: List[Dict[str, Any]]) -> None:
+        # One clock read per batch for events submitted without a timestamp
+        batch_ts: Optional[str] = None
+        for event in events:
+            if not event.get("timestamp"):
+                if batch_ts is None:
+                    batch_ts = _now_iso_z()
+                event["timestamp"] = batch_ts
+        # Safe to retry: Metronome dedupes ingest on transaction_id
+        # Sent directly rather than via sdk.v1.usage.ingest so the (possibly
+        # large) event array is encoded by orjson instead of stdlib json
+        await self._call("usage.ingest", lambda: self._post_json("/v1/ingest", events))
+        # Debits must show up on the next balance read
+        await self._forget_balances({e.get("customer_id") for e in events})
 
     async def record_usage_event(self, customer_id: str, event_data: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            # If the SDK has a dedicated usage events API; otherwise fallback to ingest
-            properties = event_data.get("properties", {})
-            timestamp = event_data.get("timestamp") or datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-            payload = {
-                "customer_id": customer_id,
-                "event_name": event_data.get("event_name") or event_data.get("event_type"),
-                "timestamp": timestamp,
-                "properties": properties,
-            }
-            # SDK doesn't expose a separate usage events resource; prefer ingest
-            return await self.ingest_usage_event({
-                "customer_id": customer_id,
-                "event_type": event_data.get("event_name") or event_data.get("event_type"),
-                "timestamp": timestamp,
-                "transaction_id": event_data.get("transaction_id"),
-                "properties": properties,
-            })
-        except Exception:
-            # Fallback: attempt ingest
-            return await self.ingest_usage_event({
-                "customer_id": customer_id,
-                "event_type": event_data.get("event_name") or event_data.get("event_type"),
-                "timestamp": event_data.get("timestamp") or datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
-                "transaction_id": event_data.get("transaction_id"),
-                "properties": event_data.get("properties", {}),
-            })
+        # SDK doesn't expose a separate usage events resource; prefer ingest.
+        # Timestamp is left unset when not given; _ingest_batch stamps the batch time.
+        # ingest_usage_event already raises a typed MetronomeError on failure.
+        return await self.ingest_usage_event({
+            "customer_id": customer_id,
+            "event_type": event_data.get("event_name") or event_data.get("event_type"),
+            "timestamp": event_data.get("timestamp"),
+            "transaction_id": event_data.get("transaction_id"),
+            "properties": event_data.get("properties", {}),
+        })
 
     # ---- Threshold Billing ----
+    async def _post_json(self, path: str, payload: Any) -> bytes:
+        """POST an orjson-encoded body on the shared client and return the raw response body."""
+        # Content-Type is set on the client
+        resp = await self._http.post(path, content=orjson.dumps(payload))
+        raw = resp.content
+        if resp.status_code not in (200, 201, 202):
+            detail = raw[:ERROR_BODY_MAX].decode("utf-8", errors="replace")
+            raise error_class_for_status(resp.status_code)(
+                f"HTTP {resp.status_code}: {detail}",
+                status_code=resp.status_code,
+                retry_after=parse_retry_after(resp.headers.get("retry-after")),
+            )
+        return raw
+
     async def release_threshold_billing(self, workflow_id: str, outcome: str) -> Dict[str, Any]:
         """
         Temporary shim: call the threshold-billing release endpoint directly
         using the same bearer/base_url as the SDK client.
         """
-        import httpx
-        url = f"{settings.METRONOME_API_URL.rstrip('/')}/v1/contracts/commits/threshold-billing/release"
-        headers = {
-            "Authorization": f"Bearer {settings.METRONOME_API_KEY}",
-            "Content-Type": "application/json",
-        }
         payload = {"workflow_id": workflow_id, "outcome": outcome}
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(url, headers=headers, json=payload)
-                if resp.status_code not in (200, 201, 202):
-                    raise RuntimeError(f"HTTP {resp.status_code}: {resp.text}")
-                data = resp.json() if resp.text.strip() else {"status": "success"}
-                return {"success": True, "response": data}
+            # Safe to retry: a repeated release answers "already COMMITTED",
+            # which safe_release_threshold_billing treats as success
+            raw = await self._call(
+                "threshold_billing.release",
+                lambda: self._post_json("/v1/contracts/commits/threshold-billing/release", payload),
+            )
+            data = orjson.loads(raw) if raw.strip() else {"status": "success"}
+            return {"success": True, "response": data}
         except Exception as e:
-            raise RuntimeError(f"Threshold billing release failed: {e}")
+            raise to_metronome_error(e, "Threshold billing release failed") from e
 
     async def safe_release_threshold_billing(self, workflow_id: str, outcome: str) -> Dict[str, Any]:
         try:
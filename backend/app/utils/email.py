@@ -3,20 +3,67 @@ Email utility - supports SMTP (MailHog) and Resend
 """
 
 import asyncio
+import logging
 import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
-from typing import Optional
+from functools import lru_cache
+from html import escape
+from string import Template
+from typing import Awaitable, Optional, Set
 import httpx
+import orjson
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-def _build_welcome_html(first_name: str, credits: int, trial_days: int, trial_end_date: Optional[str]) -> str:
-    dashboard_url = settings.DASHBOARD_URL
-    docs_url = settings.DOCS_URL
-    name = first_name or "there"
-    end_str = f"Trial ends on <strong>{trial_end_date}</strong> (UTC)." if trial_end_date else ""
-    minutes = max(1, credits // 1000)
-    return f"""
+# Derived from settings once; the URL never changes at runtime
+_BILLING_PROMO_URL = settings.DASHBOARD_URL.replace("/dashboard", "/billing") + "?promo=TRIAL20"
+_ERROR_BODY_MAX = 2048
+
+_resend_client: Optional[httpx.AsyncClient] = None
+
+# One long-lived SMTP session, used from a single dedicated thread so sends
+# don't reconnect each time or compete with other default-executor work
+_smtp: Optional[smtplib.SMTP] = None
+_smtp_lock = threading.Lock()
+_smtp_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+
+# Scheduled sends run after the webhook response; cap how many are in flight
+# at once and keep references so tasks aren't garbage-collected mid-send
+EMAIL_MAX_CONCURRENT_SENDS = 20
+_send_slots = asyncio.Semaphore(EMAIL_MAX_CONCURRENT_SENDS)
+_pending_sends: Set["asyncio.Task[None]"] = set()
+
+
+def _get_resend_client() -> httpx.AsyncClient:
+    """Process-wide Resend client, so signup emails reuse a warm TLS connection."""
+    global _resend_client
+    if _resend_client is None:
+        _resend_client = httpx.AsyncClient(
+            base_url="https://api.resend.com",
+            headers={"Authorization": f"Bearer {settings.RESEND_API_KEY}", "Content-Type": "application/json"},
+            timeout=20,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            http2=True,
+        )
+    return _resend_client
+
+
+async def close_email_clients() -> None:
+    global _resend_client
+    # Let scheduled sends finish before their connections go away
+    if _pending_sends:
+        await asyncio.gather(*_pending_sends, return_exceptions=True)
+    if _resend_client is not None:
+        await _resend_client.aclose()
+        _resend_client = None
+    await asyncio.get_running_loop().run_in_executor(_smtp_executor, _close_smtp)
+
+
+# Static email skeletons, parsed once; only per-recipient fields vary per send
+_WELCOME_TEMPLATE = Template("""
 <!doctype html>
 <html><body style='margin:0;padding:0;background:#f7f9fc;font-family:Inter,system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif;color:#1f2937;'>
   <table role='presentation' width='100%' cellpadding='0' cellspacing='0' style='background:#f7f9fc;padding:24px 0;'>
@@ -25,13 +72,10 @@ def _build_welcome_html(first_name: str, credits: int, trial_days: int, trial_en
         <tr><td style='text-align:center;padding-bottom:8px;'><div style='display:inline-block;background:#1e88e5;color:#fff;border-radius:12px;padding:6px 10px;font-weight:700;'>VOCALIS</div></td></tr>
         <tr><td style='font-size:24px;font-weight:800;color:#111827;text-align:center;'>Welcome to Vocalis! 🎉</td></tr>
         <tr><td style='height:8px;'></td></tr>
-        <tr><td style='font-size:16px;color:#374151;'>Hey {name},<br><br>Awesome! Your Vocalis account is ready. Here's what you got:</td></tr>
+        <tr><td style='font-size:16px;color:#374151;'>Hey $name,<br><br>Awesome! Your Vocalis account is ready. Here's what you got:</td></tr>
         <tr><td style='height:12px;'></td></tr>
         <tr><td>
-          <div style='background:#eef6ff;border:1px solid #93c5fd;border-radius:12px;padding:20px;text-align:center;'>
-            <div style='font-size:34px;font-weight:800;color:#1e3a8a'>{credits:,} credits</div>
-            <div style='color:#64748b;font-size:14px;'>≈ {minutes} minutes of voice generation</div>
-          </div>
+$hero
         </td></tr>
         <tr><td style='height:16px;'></td></tr>
         <tr><td style='font-size:14px;color:#111827;font-weight:700;'>What you can do with your credits:</td></tr>
@@ -44,17 +88,61 @@ def _build_welcome_html(first_name: str, credits: int, trial_days: int, trial_en
           </ul>
         </td></tr>
         <tr><td style='height:12px;'></td></tr>
-        <tr><td style='font-size:13px;color:#6b7280;'>{end_str}</td></tr>
+        <tr><td style='font-size:13px;color:#6b7280;'>$end_str</td></tr>
         <tr><td style='height:16px;'></td></tr>
-        <tr><td><a href='{dashboard_url}' style='display:inline-block;background:#1e88e5;color:#fff;text-decoration:none;font-weight:600;padding:12px 18px;border-radius:8px;'>Start Creating Voices →</a></td></tr>
+        <tr><td><a href='$dashboard_url' style='display:inline-block;background:#1e88e5;color:#fff;text-decoration:none;font-weight:600;padding:12px 18px;border-radius:8px;'>Start Creating Voices →</a></td></tr>
         <tr><td style='height:16px;'></td></tr>
-        <tr><td style='font-size:13px;color:#6b7280;'>Questions? Just reply to this email. Need help? <a href='{docs_url}' style='color:#1e88e5;text-decoration:none;'>Read the docs</a>.</td></tr>
+        <tr><td style='font-size:13px;color:#6b7280;'>Questions? Just reply to this email. Need help? <a href='$docs_url' style='color:#1e88e5;text-decoration:none;'>Read the docs</a>.</td></tr>
       </table>
       <div style='font-size:12px;color:#9ca3af;margin-top:12px;'>© Vocalis. All rights reserved.</div>
     </td></tr>
   </table>
 </body></html>
-"""
+""")
+
+
+_CONVERSION_TEMPLATE = Template("""
+<!doctype html>
+<html><body style='margin:0;padding:0;background:#f7f9fc;font-family:Inter,system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif;color:#1f2937;'>
+  <table role='presentation' width='100%' cellpadding='0' cellspacing='0' style='background:#f7f9fc;padding:24px 0;'>
+    <tr><td align='center'>
+      <table role='presentation' width='600' cellpadding='0' cellspacing='0' style='background:#fff;border-radius:12px;padding:28px;border:1px solid #e5e7eb;'>
+        <tr><td style='font-size:22px;font-weight:800;color:#111827;'>Your trial ends in $days_left days</td></tr>
+        <tr><td style='height:8px;'></td></tr>
+        <tr><td style='font-size:16px;color:#374151;'>Hi $name,<br><br>Keep creating with Vocalis — upgrade now and enjoy <strong>20% off</strong> your first month.</td></tr>
+        <tr><td style='height:16px;'></td></tr>
+        <tr><td><a href='$promo_url' style='display:inline-block;background:#1e88e5;color:#fff;text-decoration:none;font-weight:600;padding:12px 18px;border-radius:8px;'>See Plans</a></td></tr>
+        <tr><td style='height:12px;'></td></tr>
+        <tr><td style='font-size:13px;color:#6b7280;'>$end_line</td></tr>
+      </table>
+      <div style='font-size:12px;color:#9ca3af;margin-top:12px;'>© Vocalis. All rights reserved.</div>
+    </td></tr>
+  </table>
+</body></html>
+""")
+
+
+@lru_cache(maxsize=32)
+def _hero_block(credits: int) -> str:
+    """Credits panel; trials grant a handful of fixed amounts, so renders repeat."""
+    minutes = max(1, credits // 1000)
+    return f"""          <div style='background:#eef6ff;border:1px solid #93c5fd;border-radius:12px;padding:20px;text-align:center;'>
+            <div style='font-size:34px;font-weight:800;color:#1e3a8a'>{credits:,} credits</div>
+            <div style='color:#64748b;font-size:14px;'>≈ {minutes} minutes of voice generation</div>
+          </div>"""
+
+
+def _build_welcome_html(first_name: str, credits: int, trial_days: int, trial_end_date: Optional[str]) -> str:
+    # Names come from signup forms; escape before they reach the HTML
+    name = escape(first_name or "there")
+    end_str = f"Trial ends on <strong>{escape(trial_end_date)}</strong> (UTC)." if trial_end_date else ""
+    return _WELCOME_TEMPLATE.substitute(
+        name=name,
+        hero=_hero_block(credits),
+        end_str=end_str,
+        dashboard_url=settings.DASHBOARD_URL,
+        docs_url=settings.DOCS_URL,
+    )
 
 
 def _build_text_fallback(first_name: str, credits: int, trial_days: int, trial_end_date: Optional[str]) -> str:
@@ -77,8 +165,42 @@ def _send_smtp(subject: str, to: str, html: str, text: Optional[str] = None):
     msg["To"] = to
     msg.set_content(text or "")
     msg.add_alternative(html, subtype="html")
-    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as s:
-        s.send_message(msg)
+    with _smtp_lock:
+        try:
+            _smtp_connection().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle session between checks; retry once fresh
+            _close_smtp_locked()
+            _smtp_connection().send_message(msg)
+
+
+def _smtp_connection() -> smtplib.SMTP:
+    """The pooled SMTP session, reconnected if the server closed it. Caller holds _smtp_lock."""
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except smtplib.SMTPException:
+            pass
+        _close_smtp_locked()
+    _smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
+    return _smtp
+
+
+def _close_smtp_locked() -> None:
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            _smtp.close()
+        _smtp = None
+
+
+def _close_smtp() -> None:
+    with _smtp_lock:
+        _close_smtp_locked()
 
 
 async def _send_resend(subject: str, to: str, html: str, text: Optional[str] = None):
@@ -93,11 +215,11 @@ async def _send_resend(subject: str, to: str, html: str, text: Optional[str] = N
     }
     if text:
         payload["text"] = text
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.post("https://api.resend.com/emails", headers=headers, json=payload)
-        if resp.status_code not in (200, 202):
-            raise RuntimeError(f"Resend error: {resp.status_code} {resp.text}")
+    # Content-Type is set on the client
+    resp = await _get_resend_client().post("/emails", content=orjson.dumps(payload))
+    if resp.status_code not in (200, 202):
+        detail = resp.content[:_ERROR_BODY_MAX].decode("utf-8", errors="replace")
+        raise RuntimeError(f"Resend error: {resp.status_code} {detail}")
 
 
 async def send_welcome_email(to: str, first_name: str, credits: int, trial_days: int, trial_end_date: Optional[str] = None):
@@ -108,7 +230,7 @@ async def send_welcome_email(to: str, first_name: str, credits: int, trial_days:
     provider = (settings.EMAIL_PROVIDER or "smtp").lower()
     if provider == "smtp":
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _send_smtp, subject, to, html, text)
+        await loop.run_in_executor(_smtp_executor, _send_smtp, subject, to, html, text)
     elif provider == "resend":
         await _send_resend(subject, to, html, text)
     else:
@@ -118,33 +240,48 @@ async def send_welcome_email(to: str, first_name: str, credits: int, trial_days:
 async def send_conversion_email(to: str, first_name: str, days_left: int, trial_end_date: Optional[str] = None):
     subject = f"{days_left} days left — keep creating with Vocalis (20% off)"
     name = first_name or "there"
-    end_line = f"Trial ends on <strong>{trial_end_date}</strong>." if trial_end_date else ""
-    html = f"""
-<!doctype html>
-<html><body style='margin:0;padding:0;background:#f7f9fc;font-family:Inter,system-ui,Segoe UI,Roboto,Helvetica,Arial,sans-serif;color:#1f2937;'>
-  <table role='presentation' width='100%' cellpadding='0' cellspacing='0' style='background:#f7f9fc;padding:24px 0;'>
-    <tr><td align='center'>
-      <table role='presentation' width='600' cellpadding='0' cellspacing='0' style='background:#fff;border-radius:12px;padding:28px;border:1px solid #e5e7eb;'>
-        <tr><td style='font-size:22px;font-weight:800;color:#111827;'>Your trial ends in {days_left} days</td></tr>
-        <tr><td style='height:8px;'></td></tr>
-        <tr><td style='font-size:16px;color:#374151;'>Hi {name},<br><br>Keep creating with Vocalis — upgrade now and enjoy <strong>20% off</strong> your first month.</td></tr>
-        <tr><td style='height:16px;'></td></tr>
-        <tr><td><a href='{settings.DASHBOARD_URL.replace('/dashboard','/billing') + '?promo=TRIAL20'}' style='display:inline-block;background:#1e88e5;color:#fff;text-decoration:none;font-weight:600;padding:12px 18px;border-radius:8px;'>See Plans</a></td></tr>
-        <tr><td style='height:12px;'></td></tr>
-        <tr><td style='font-size:13px;color:#6b7280;'>{end_line}</td></tr>
-      </table>
-      <div style='font-size:12px;color:#9ca3af;margin-top:12px;'>© Vocalis. All rights reserved.</div>
-    </td></tr>
-  </table>
-</body></html>
-"""
+    end_line = f"Trial ends on <strong>{escape(trial_end_date)}</strong>." if trial_end_date else ""
+    html = _CONVERSION_TEMPLATE.substitute(
+        days_left=days_left, name=escape(name), promo_url=_BILLING_PROMO_URL, end_line=end_line
+    )
     text = f"Hi {name},\n\nYour Vocalis trial ends in {days_left} days. Upgrade now for 20% off. {('Trial ends on ' + trial_end_date) if trial_end_date else ''}\n"
 
     provider = (settings.EMAIL_PROVIDER or "smtp").lower()
     if provider == "smtp":
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, _send_smtp, subject, to, html, text)
+        await loop.run_in_executor(_smtp_executor, _send_smtp, subject, to, html, text)
     elif provider == "resend":
         await _send_resend(subject, to, html, text)
     else:
         raise RuntimeError(f"Unknown EMAIL_PROVIDER: {settings.EMAIL_PROVIDER}")
+
+
+def schedule_welcome_email(
+    to: str, first_name: str, credits: int, trial_days: int, trial_end_date: Optional[str] = None
+) -> "asyncio.Task[None]":
+    """Send the welcome email in the background; failures are logged, not raised."""
+    return _schedule("welcome", to, send_welcome_email(to, first_name, credits, trial_days, trial_end_date))
+
+
+def schedule_conversion_email(
+    to: str, first_name: str, days_left: int, trial_end_date: Optional[str] = None
+) -> "asyncio.Task[None]":
+    """Send the conversion email in the background; failures are logged, not raised."""
+    return _schedule("conversion", to, send_conversion_email(to, first_name, days_left, trial_end_date))
+
+
+def _schedule(kind: str, to: str, send: Awaitable[None]) -> "asyncio.Task[None]":
+    async def run() -> None:
+        async with _send_slots:
+            await send
+
+    task = asyncio.create_task(run())
+    _pending_sends.add(task)
+
+    def done(t: "asyncio.Task[None]") -> None:
+        _pending_sends.discard(t)
+        if not t.cancelled() and t.exception() is not None:
+            logger.error("Failed to send %s email to %s: %s", kind, to, t.exception())
+
+    task.add_done_callback(done)
+    return task
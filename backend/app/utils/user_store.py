@@ -1,74 +1,276 @@
-import os
+import asyncio
+import logging
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict
-from datetime import datetime, timezone
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
+from app.utils.ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 DB_PATH = DATA_DIR / "vocalis.sqlite"
 
 
-def _connect():
+POOL_SIZE = 4
+# Larger pages mean a shallower B-tree. New files get it on creation; existing
+# ones are converted offline by scripts/migrate_user_store.py
+PAGE_SIZE = 8192
+MMAP_SIZE = 1 << 30
+# Profiles change only on signup; bounded staleness for other workers' writes
+USER_CACHE_TTL = 60.0
+USER_CACHE_MAXSIZE = 4096
+
+# Rows live directly in the primary-key B-tree (no rowid indirection), and
+# STRICT enforces the declared types where this SQLite is new enough (3.37+)
+_USERS_TABLE_OPTIONS = "WITHOUT ROWID, STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else "WITHOUT ROWID"
+_USERS_COLUMNS = """
+    customer_id TEXT PRIMARY KEY,
+    email TEXT NOT NULL,
+    first_name TEXT,
+    full_name TEXT,
+    created_at INTEGER NOT NULL  -- epoch microseconds (UTC)
+"""
+
+# Statement text is fixed so each pooled connection compiles it once and then
+# serves it from its prepared-statement cache
+_CREATE_USERS_SQL = f"CREATE TABLE IF NOT EXISTS users ({_USERS_COLUMNS}) {_USERS_TABLE_OPTIONS}"
+# Older databases have a rowid table, and before that ISO-8601 text created_at
+_MIGRATE_USERS_SQL = f"""
+CREATE TABLE users_new ({_USERS_COLUMNS}) {_USERS_TABLE_OPTIONS};
+INSERT INTO users_new(customer_id, email, first_name, full_name, created_at)
+    SELECT customer_id, email, first_name, full_name,
+           CASE WHEN typeof(created_at) = 'text'
+                THEN CAST(strftime('%s', created_at) AS INTEGER) * 1000000
+                ELSE created_at END
+    FROM users;
+DROP TABLE users;
+ALTER TABLE users_new RENAME TO users;
+"""
+# first_name is stored only when it isn't simply the first word of full_name
+# (the usual case), so most rows carry the name once
+_DEDUPE_FIRST_NAME_SQL = """
+UPDATE users SET first_name = NULL
+WHERE first_name IS NOT NULL
+  AND instr(first_name, ' ') = 0
+  AND (full_name = first_name OR substr(full_name, 1, length(first_name) + 1) = first_name || ' ')
+"""
+_UPSERT_USER_SQL = """
+INSERT INTO users(customer_id, email, first_name, full_name, created_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(customer_id) DO UPDATE SET
+    email=excluded.email,
+    first_name=excluded.first_name,
+    full_name=excluded.full_name
+"""
+_SELECT_USER_SQL = "SELECT customer_id, email, first_name, full_name FROM users WHERE customer_id = ?"
+
+
+def _connect() -> sqlite3.Connection:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+    # Handed between threads by the pool, but only ever used by one at a time
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    # Only takes effect while the file is still empty
+    conn.execute(f"PRAGMA page_size={PAGE_SIZE}")
+    # WAL lets readers proceed during a write; NORMAL only fsyncs at checkpoints
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    # Lookups read mapped pages instead of issuing read() syscalls (capped by file size)
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    # Keep the WAL file from growing without bound after a checkpoint
+    conn.execute("PRAGMA journal_size_limit=67108864")
+    return conn
 
 
-def init_db():
-    conn = _connect()
-    try:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                customer_id TEXT PRIMARY KEY,
-                email TEXT NOT NULL,
-                first_name TEXT,
-                full_name TEXT,
-                created_at TEXT NOT NULL
+class _ConnectionPool:
+    """
+    Fixed set of long-lived connections, each keeping its own SQLite page and
+    schema caches warm. acquire() blocks while all of them are checked out.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        conn = self._checkout()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return _connect()
+                except BaseException:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    def stats(self) -> Dict[str, int]:
+        idle = self._idle.qsize()
+        return {"size": self.size, "open": self._opened, "idle": idle, "active": self._opened - idle}
+
+    def close(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._opened -= 1
+
+
+_pool = _ConnectionPool(POOL_SIZE)
+_user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+# Bumped on every invalidation; a load that started before the latest bump may
+# have read the old row and must not put it back in the cache
+_user_cache_generation = 0
+
+
+def pool_stats() -> Dict[str, int]:
+    return _pool.stats()
+
+
+def close_db():
+    _pool.close()
+
+
+# Public functions are async: SQLite work runs on a worker thread (to_thread)
+# so a slow commit or fsync never blocks the event loop. The pool keeps
+# connections warm across those threads.
+
+
+async def init_db():
+    await asyncio.to_thread(_init_db)
+
+
+def _init_db():
+    with _pool.acquire() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        if page_size != PAGE_SIZE:
+            # Rewriting the file here would race other workers starting up
+            logger.warning(
+                "User store uses %d-byte pages (want %d); stop the app and run "
+                "`python -m scripts.migrate_user_store` to convert it",
+                page_size, PAGE_SIZE,
             )
-            """
-        )
-        conn.commit()
-    finally:
-        conn.close()
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'users'").fetchone()
+        if row is None:
+            conn.execute(_CREATE_USERS_SQL)
+            conn.commit()
+        elif "WITHOUT ROWID" not in row[0].upper():
+            # executescript commits first, so run the rebuild as one explicit transaction
+            conn.executescript("BEGIN;" + _MIGRATE_USERS_SQL + "COMMIT;")
+        # user_version records one-off data migrations already applied
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            conn.execute(_DEDUPE_FIRST_NAME_SQL)
+            conn.execute("PRAGMA user_version = 1")
+            conn.commit()
 
 
-def upsert_user(customer_id: str, email: str, first_name: Optional[str], full_name: Optional[str]):
-    conn = _connect()
+def migrate_page_size() -> None:
+    """
+    Rewrite the database with PAGE_SIZE pages. page_size only changes through
+    a VACUUM, which WAL mode doesn't allow, so this needs exclusive access:
+    run it while no app process has the database open.
+    """
+    conn = sqlite3.connect(DB_PATH)
     try:
-        now = datetime.now(timezone.utc).isoformat()
-        conn.execute(
-            """
-            INSERT INTO users(customer_id, email, first_name, full_name, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(customer_id) DO UPDATE SET
-                email=excluded.email,
-                first_name=excluded.first_name,
-                full_name=excluded.full_name
-            """,
-            (customer_id, email, first_name, full_name, now),
-        )
-        conn.commit()
+        if conn.execute("PRAGMA page_size").fetchone()[0] == PAGE_SIZE:
+            return
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute(f"PRAGMA page_size={PAGE_SIZE}")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA journal_mode=WAL")
     finally:
         conn.close()
 
 
-def get_user_by_customer_id(customer_id: str) -> Optional[Dict[str, str]]:
-    conn = _connect()
-    try:
-        cur = conn.execute(
-            "SELECT customer_id, email, first_name, full_name FROM users WHERE customer_id = ?",
-            (customer_id,),
+def _leading_word(full_name: Optional[str]) -> str:
+    return (full_name or "").split(" ", 1)[0]
+
+
+async def upsert_user(customer_id: str, email: str, first_name: Optional[str], full_name: Optional[str]):
+    await upsert_users([(customer_id, email, first_name, full_name)])
+
+
+async def upsert_users(rows: Iterable[Tuple[str, str, Optional[str], Optional[str]]]):
+    """
+    Insert or update many (customer_id, email, first_name, full_name) rows in
+    one transaction, so a backfill or webhook replay pays one commit, not one per row.
+    """
+    await asyncio.to_thread(_upsert_users, list(rows))
+
+
+def _upsert_users(rows: List[Tuple[str, str, Optional[str], Optional[str]]]):
+    now = time.time_ns() // 1000
+    with _pool.acquire() as conn:
+        conn.executemany(
+            _UPSERT_USER_SQL,
+            (
+                (customer_id, email, None if first_name == _leading_word(full_name) else first_name, full_name, now)
+                for customer_id, email, first_name, full_name in rows
+            ),
         )
-        row = cur.fetchone()
-        if not row:
-            return None
-        return {
-            "customer_id": row[0],
-            "email": row[1],
-            "first_name": row[2] or "",
-            "full_name": row[3] or "",
-        }
-    finally:
-        conn.close()
+        conn.commit()
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        for row in rows:
+            _user_cache.pop(row[0])
+
+
+async def get_user_by_customer_id(customer_id: str) -> Optional[Mapping[str, str]]:
+    """
+    Profile for a customer, or None. The result is a read-only view of the
+    cached entry, so lookups don't copy it and callers can't mutate the cache.
+    """
+    # Cache hits are answered without a thread hop
+    with _user_cache_lock:
+        cached = _user_cache.get(customer_id)
+    if cached is None:
+        cached = await asyncio.to_thread(_load_user, customer_id)
+    return MappingProxyType(cached) if cached is not None else None
+
 
+def _load_user(customer_id: str) -> Optional[Dict[str, str]]:
+    with _user_cache_lock:
+        generation = _user_cache_generation
+    with _pool.acquire() as conn:
+        row = conn.execute(_SELECT_USER_SQL, (customer_id,)).fetchone()
+    if not row:
+        # Misses aren't cached: the user may be about to sign up
+        return None
+    user = {
+        "customer_id": row[0],
+        "email": row[1],
+        "first_name": row[2] or _leading_word(row[3]),
+        "full_name": row[3] or "",
+    }
+    with _user_cache_lock:
+        if generation == _user_cache_generation:
+            _user_cache.set(customer_id, user)
+    return user
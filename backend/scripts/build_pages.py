@@ -0,0 +1,30 @@
+"""
+Pre-render the page templates to static HTML
+Output goes to frontend/static/pages/<name>.html: simple-main.py serves it
+without loading Jinja, and the /static mount (or a CDN/nginx in front of it)
+can serve the files directly.
+
+Usage (from backend/): python -m scripts.build_pages
+"""
+
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader
+
+from app.pages import PAGES
+
+FRONTEND_DIR = Path(__file__).resolve().parents[2] / "frontend"
+TEMPLATES_DIR = FRONTEND_DIR / "templates"
+OUTPUT_DIR = FRONTEND_DIR / "static" / "pages"
+
+def main() -> None:
+    env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)), autoescape=True)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    for name, context in PAGES.items():
+        out = OUTPUT_DIR / f"{name}.html"
+        out.write_text(env.get_template(f"pages/{name}.html").render(**context), encoding="utf-8")
+        print(f"wrote {out.relative_to(FRONTEND_DIR.parent)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Convert the SQLite user store to the page size the app expects
+Stop every app worker first: the rewrite (VACUUM) needs the database to
+itself. The app only warns at startup when a conversion is pending.
+
+Usage (from backend/): python -m scripts.migrate_user_store
+"""
+
+from app.utils import user_store
+
+
+def main() -> None:
+    if not user_store.DB_PATH.exists():
+        print(f"{user_store.DB_PATH} does not exist; nothing to migrate")
+        return
+    user_store.migrate_page_size()
+    print(f"{user_store.DB_PATH} uses {user_store.PAGE_SIZE}-byte pages")
+
+
+if __name__ == "__main__":
+    main()
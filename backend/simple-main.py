@@ -3,38 +3,97 @@ SIMPLE Vocalis Frontend Server
 Just serves the HTML pages - no complex API stuff
 """
 
-from fastapi import FastAPI, Request
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+from jinja2 import FileSystemBytecodeCache
+
+from fastapi import FastAPI, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 import uvicorn
 
+from app.pages import PAGES
+
 # Simple FastAPI app
 app = FastAPI(title="Vocalis Frontend")
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="../frontend/static"), name="static")
-templates = Jinja2Templates(directory="../frontend/templates")
+# Compiled templates are kept on disk so restarts and extra workers skip Jinja
+# compilation; templates don't change while the server runs. Jinja's default
+# directory is private to the current user, so other users can't plant bytecode
+templates = Jinja2Templates(
+    directory="../frontend/templates",
+    bytecode_cache=FileSystemBytecodeCache(),
+    auto_reload=False,
+)
+
+# Pages don't depend on the request, so each is rendered once at startup and
+# served with an ETag for 304 revalidation. Output of scripts/build_pages.py
+# is used when present, so startup doesn't touch Jinja at all.
+PAGE_CACHE_CONTROL = "public, max-age=300"
+PREBUILT_PAGES_DIR = Path("../frontend/static/pages")
+
+
+def _prerender(name: str) -> Tuple[bytes, str]:
+    prebuilt = PREBUILT_PAGES_DIR / f"{name}.html"
+    if prebuilt.is_file():
+        body = prebuilt.read_bytes()
+    else:
+        body = templates.get_template(f"pages/{name}.html").render(**PAGES[name]).encode("utf-8")
+    etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+    return body, etag
+
+
+_PAGES: Dict[str, Tuple[bytes, str]] = {
+    name: _prerender(name) for name in PAGES
+}
+
+
+def _page_response(request: Request, page: str) -> Response:
+    body, etag = _PAGES[page]
+    headers = {"ETag": etag, "Cache-Control": PAGE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
 
 @app.get("/", response_class=HTMLResponse)
 async def landing_page(request: Request):
-    return templates.TemplateResponse("pages/landing.html", {"request": request})
+    return _page_response(request, "landing")
 
 @app.get("/signup", response_class=HTMLResponse)
 async def signup_page(request: Request):
-    return templates.TemplateResponse("pages/signup.html", {"request": request})
+    return _page_response(request, "signup")
 
 @app.get("/billing", response_class=HTMLResponse)
 async def billing_page(request: Request):
-    return templates.TemplateResponse("pages/billing.html", {"request": request})
+    return _page_response(request, "billing")
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard_page(request: Request):
-    return templates.TemplateResponse("pages/dashboard.html", {"request": request})
+    return _page_response(request, "dashboard")
 
 @app.get("/health")
 async def health():
     return {"status": "Frontend working!"}
 
 if __name__ == "__main__":
-    uvicorn.run("simple-main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # uvloop/httptools ship with uvicorn[standard]. Reload can't be combined
+    # with workers, so it is opt-in for local development (RELOAD=1)
+    if os.getenv("RELOAD") == "1":
+        uvicorn.run("simple-main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "simple-main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            access_log=False,
+        )
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Metronome client tests
+Run from backend/: python -m pytest -q
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+# Settings are read once at import; the client only needs a key to construct
+os.environ.setdefault("METRONOME_API_KEY", "test-key")
+
+from app.core.config import settings  # noqa: E402
+from app.services.metronome.errors import MetronomeSchemaError  # noqa: E402
+from app.services.metronome.sdk_client import (  # noqa: E402
+    CREDITS_PER_CENT,
+    USD_CENTS_CREDIT_TYPE_ID,
+    SdkMetronomeClient,
+    _sum_balances,
+)
+
+
+def _entry(credit_type_id, balance):
+    return SimpleNamespace(
+        access_schedule=SimpleNamespace(credit_type=SimpleNamespace(id=credit_type_id)),
+        balance=balance,
+    )
+
+
+def test_sum_balances_by_credit_type():
+    entries = [
+        _entry(settings.VOCALIS_CREDIT_TYPE_ID, 30_000),
+        _entry(settings.VOCALIS_CREDIT_TYPE_ID, 10_000),
+        _entry(USD_CENTS_CREDIT_TYPE_ID, 250),
+        _entry("some-other-credit-type", 999),
+    ]
+    assert _sum_balances(entries) == (40_000, True, 250)
+
+
+def test_sum_balances_skips_entries_without_schedule_or_balance():
+    entries = [
+        SimpleNamespace(access_schedule=None, balance=500),
+        SimpleNamespace(access_schedule=SimpleNamespace(credit_type=None), balance=500),
+        _entry(settings.VOCALIS_CREDIT_TYPE_ID, None),
+        _entry(USD_CENTS_CREDIT_TYPE_ID, 100),
+    ]
+    assert _sum_balances(entries) == (0, False, 100)
+
+
+def test_sum_balances_rejects_non_numeric_balance():
+    with pytest.raises(MetronomeSchemaError):
+        _sum_balances([_entry(settings.VOCALIS_CREDIT_TYPE_ID, "40000")])
+
+
+def test_credit_conversion_identities():
+    # 1 cent = 40 credits, so $1 = 4,000 credits and 1 credit = $0.00025
+    assert CREDITS_PER_CENT * 100 == 4_000
+    for cents in (0, 1, 99, 100, 12_345):
+        credits = cents * CREDITS_PER_CENT
+        assert credits // CREDITS_PER_CENT == cents
+    # Partial cents floor instead of producing float noise
+    assert (40_039 // CREDITS_PER_CENT) / 100 == 10.0
+
+
+@pytest_asyncio.fixture
+async def client():
+    c = SdkMetronomeClient()
+    try:
+        yield c
+    finally:
+        await c.aclose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "entries, expected",
+    [
+        # Vocalis credits: whole cents via integer math, then dollars
+        ([_entry(settings.VOCALIS_CREDIT_TYPE_ID, 40_000)], (40_000, "VC", 10.0)),
+        ([_entry(settings.VOCALIS_CREDIT_TYPE_ID, 123_479)], (123_479, "VC", 30.86)),
+        # USD cents only: credits are cents * 40
+        ([_entry(USD_CENTS_CREDIT_TYPE_ID, 1_050)], (42_000, "USD", 10.5)),
+        ([], (0, "USD", 0.0)),
+    ],
+)
+async def test_get_customer_balance_conversion(client, monkeypatch, entries, expected):
+    async def fake_fetch(self, customer_id, shared=True):
+        return entries
+
+    monkeypatch.setattr(SdkMetronomeClient, "_fetch_balance_entries", fake_fetch)
+    result = await client.get_customer_balance("cust_1", force_refresh=True)
+    assert (result["balance"], result["currency"], result["dollar_value"]) == expected
+    assert isinstance(result["balance"], int)